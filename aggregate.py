@@ -0,0 +1,84 @@
+import heapq
+from bisect import bisect_left
+from itertools import count
+
+from analyzer import FILE_METRIC_KEYS, feed_records, file_metrics, iter_folder_records
+from function_table import RANKS
+from report import write_csv_rows
+
+TOP_K = 20
+
+# Upper bounds (inclusive) of the function-length histogram buckets; the last bucket is open.
+LENGTH_BUCKETS = [10, 25, 50, 100, 200]
+
+class StreamingAggregator:
+    # Folder-wide statistics computed one record at a time in constant memory:
+    # running totals and maxima, rank and length histograms, and a bounded heap
+    # holding the K most complex functions seen so far.
+
+    def __init__(self, top_k=TOP_K):
+        self.top_k = top_k
+        self.files = 0
+        self.line_count = 0
+        self.function_count = 0
+        self.function_length_total = 0.0
+        self.max_function_length = 0
+        self.blocks = 0
+        self.complexity_total = 0
+        self.max_complexity = 0
+        self.rank_counts = dict.fromkeys(RANKS, 0)
+        self.length_histogram = [0] * (len(LENGTH_BUCKETS) + 1)
+        self._worst = []
+        self._order = count()
+
+    def add(self, record):
+        self.files += 1
+        self.line_count += record["line_count"]
+        self.function_count += record["function_count"]
+        self.function_length_total += record["avg_function_length"] * record["function_count"]
+        self.max_function_length = max(self.max_function_length, record["max_function_length"])
+        for block in record["complexity"]:
+            if block["kind"] == "class":
+                continue
+            complexity = block["complexity"]
+            self.blocks += 1
+            self.complexity_total += complexity
+            self.max_complexity = max(self.max_complexity, complexity)
+            self.rank_counts[block["rank"]] += 1
+            length = block["endline"] - block["lineno"] + 1
+            self.length_histogram[bisect_left(LENGTH_BUCKETS, length)] += 1
+            # Min-heap of size K: the root is the least complex of the current top K.
+            entry = (complexity, next(self._order), record["file"], block["qualname"], block["lineno"], block["rank"])
+            if len(self._worst) < self.top_k:
+                heapq.heappush(self._worst, entry)
+            elif complexity > self._worst[0][0]:
+                heapq.heapreplace(self._worst, entry)
+
+    def worst_functions(self):
+        return [
+            {"file": file_name, "name": name, "lineno": lineno, "complexity": complexity, "rank": rank}
+            for complexity, _, file_name, name, lineno, rank in sorted(self._worst, key=lambda entry: (-entry[0], entry[1]))
+        ]
+
+    def summary(self):
+        labels = [f"<={bound}" for bound in LENGTH_BUCKETS] + [f">{LENGTH_BUCKETS[-1]}"]
+        return {
+            "files": self.files,
+            "line_count": self.line_count,
+            "function_count": self.function_count,
+            "avg_function_length": round(self.function_length_total / self.function_count, 2) if self.function_count else 0,
+            "max_function_length": self.max_function_length,
+            "avg_complexity": round(self.complexity_total / self.blocks, 2) if self.blocks else 0,
+            "max_complexity": self.max_complexity,
+            "rank_counts": dict(self.rank_counts),
+            "function_length_histogram": dict(zip(labels, self.length_histogram)),
+            "worst_functions": self.worst_functions(),
+        }
+
+def stream_folder_report(folder_path, csv_path, jobs=1, ignore=None, top_k=TOP_K):
+    # walker -> analyzer -> aggregator -> CSV, one file at a time. Nothing proportional
+    # to the size of the folder is kept, so memory stays flat however large it is.
+    aggregator = StreamingAggregator(top_k)
+    records = feed_records(iter_folder_records(folder_path, jobs, ignore), aggregator)
+    write_csv_rows((file_metrics(record) for record in records), csv_path, FILE_METRIC_KEYS)
+    return aggregator
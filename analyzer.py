@@ -1,58 +1,282 @@
 import os
 import ast
-from radon.complexity import cc_visit
+import multiprocessing
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import profiling
+from complexity import ComplexityVisitor, complexity_blocks, function_metrics
+from halstead import comment_percent, halstead_report, maintainability_index, rounded
+from line_metrics import count_kinds, line_kinds
+from walker import iter_python_files
 
-def analyze_python_file(file_path):
+# Bump whenever the shape or meaning of analysis records changes; persisted
+# results (see cache.py) are invalidated when it does.
+ANALYZER_VERSION = "9"
+
+# Small files are batched until a chunk holds roughly this many bytes of source,
+# so a worker round-trip is not paid per tiny file.
+CHUNK_BYTES = 256 * 1024
+MAX_CHUNK_FILES = 256
+
+FILE_METRIC_KEYS = [
+    "file", "line_count", "sloc", "comment_lines", "blank_lines", "docstring_lines",
+    "function_count", "avg_function_length", "max_function_length", "longest_function",
+    "halstead_volume", "halstead_difficulty", "halstead_effort", "maintainability_index"
+]
+
+def _read_source(file_path):
     with open(file_path, "r", encoding="utf-8") as f:
-        content = f.read()
+        return f.read()
+
+def _size_metrics(spans, kinds):
+    function_lengths = [end - start + 1 for _, start, end in spans]
+    longest = max(range(len(spans)), key=function_lengths.__getitem__, default=None)
+
+    # Every physical line has exactly one kind (code, comment, blank or docstring),
+    # so the line count uses the same line breaks as the four counts.
+    metrics = {"line_count": len(kinds)}
+    metrics.update(count_kinds(kinds))
+    metrics.update({
+        "function_count": len(spans),
+        "avg_function_length": round(sum(function_lengths) / len(function_lengths), 2) if spans else 0,
+        "max_function_length": function_lengths[longest] if spans else 0,
+        "longest_function": spans[longest][0] if spans else ""
+    })
+    return metrics
+
+def _halstead_metrics(counts, complexity, lines):
+    # Halstead volume, difficulty and effort plus the maintainability index, from the
+    # counts of function_metrics, the cyclomatic complexity and the line counts.
+    metrics = halstead_report(counts)
+    comments = comment_percent(lines["comment_lines"] + lines["docstring_lines"], lines["sloc"])
+    metrics["maintainability_index"] = maintainability_index(
+        metrics["halstead_volume"], complexity, counts.statements, comments
+    )
+    return rounded(metrics)
+
+def analyze_source(content, file_name):
+    # One parse feeds the size metrics, the Halstead counts and the complexity visitor.
+    stats = profiling.active()
+    if stats is not None:
+        stats.lap()
+    tree = ast.parse(content, file_name)
+    if stats is not None:
+        stats.mark("parse")
+    kinds = line_kinds(content)
+    spans, halstead, function_halstead = function_metrics(tree)
+    record = {"file": file_name}
+    record.update(_size_metrics(spans, kinds))
+    if stats is not None:
+        stats.mark("walk")
+    visitor = ComplexityVisitor()
+    visitor.visit(tree)
+    record["complexity"] = visitor.blocks
+    if stats is not None:
+        stats.mark("cc")
+    record.update(_halstead_metrics(halstead, visitor.total_complexity, record))
+    # Functions and methods get their own metrics; class blocks are left without.
+    for block in record["complexity"]:
+        counts = function_halstead.get(block["lineno"])
+        if counts is not None and block["kind"] != "class":
+            lines = count_kinds(kinds, block["lineno"], block["endline"])
+            block.update(_halstead_metrics(counts, block["complexity"], lines))
+    if stats is not None:
+        stats.mark("halstead")
+        stats.count("functions", record["function_count"])
+        stats.count("blocks", len(record["complexity"]))
+    return record
+
+def _display_name(file_path, root=None):
+    # Inside a folder analysis files are named by their path relative to the folder,
+    # so modules with the same name in different packages stay distinguishable.
+    if root is None:
+        return os.path.basename(file_path)
+    return os.path.relpath(file_path, root).replace(os.sep, "/")
+
+def analyze_file(file_path, root=None):
+    stats = profiling.active()
+    if stats is None:
+        return analyze_source(_read_source(file_path), _display_name(file_path, root))
+    start = time.perf_counter()
+    content = _read_source(file_path)
+    stats.add_time("read", time.perf_counter() - start)
+    record = analyze_source(content, _display_name(file_path, root))
+    stats.file_done(record["file"], time.perf_counter() - start, os.path.getsize(file_path))
+    return record
+
+def _report_skipped(file_path, root, error):
+    print(f"skipped {_display_name(file_path, root)}: {error}", file=sys.stderr)
+    stats = profiling.active()
+    if stats is not None:
+        stats.count("skipped_files", 1)
+
+def _analyze_or_skip(file_path, root=None):
+    # Folder analyses report a file that cannot be read or parsed (a Python 2
+    # fixture, a half-merged file) and go on without it, instead of failing the run.
+    try:
+        return analyze_file(file_path, root)
+    except (OSError, SyntaxError, ValueError) as e:
+        _report_skipped(file_path, root, e)
+        return None
+
+def file_metrics(record):
+    return {key: record[key] for key in FILE_METRIC_KEYS}
+
+def analyze_python_file(file_path, root=None):
+    # The file-level row alone. The maintainability index needs the cyclomatic
+    # complexity, so this runs the whole analysis and drops the blocks.
+    return file_metrics(analyze_source(_read_source(file_path), _display_name(file_path, root)))
 
-    tree = ast.parse(content)
-    functions = [node for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)]
+def _chunk_paths(paths, chunk_bytes=CHUNK_BYTES, size_of=os.path.getsize):
+    chunk, size = [], 0
+    for path in paths:
+        chunk.append(path)
+        size += size_of(path)
+        if size >= chunk_bytes or len(chunk) >= MAX_CHUNK_FILES:
+            yield chunk
+            chunk, size = [], 0
+    if chunk:
+        yield chunk
 
-    function_lengths = []
-    for func in functions:
-        start = func.lineno
-        if hasattr(func, 'end_lineno'):
-            end = func.end_lineno
+def _run_chunk(func, paths):
+    return [func(path) for path in paths]
+
+def _run_chunk_profiled(func, paths, top_n):
+    # Worker processes collect their own stats and ship them back with the results.
+    with profiling.collect(top_n) as stats:
+        results = _run_chunk(func, paths)
+    return results, stats
+
+def _chunk_results(future, stats):
+    if stats is None:
+        return future.result()
+    results, worker_stats = future.result()
+    stats.merge(worker_stats)
+    return results
+
+def _pool_context():
+    # Workers never come from forking this process: the app calls map_files from a
+    # multithreaded Streamlit server, and a fork taken while another thread holds a
+    # lock leaves that lock held forever in the child. A forkserver (or, where there
+    # is none, spawn) starts workers from a clean single-threaded process.
+    # The server preloads this module, so its workers start with the analysis
+    # modules already imported.
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    return context
+
+def map_files(func, paths, jobs=None, chunk_bytes=CHUNK_BYTES, size_of=os.path.getsize):
+    # Yields func(path) for every path, in input order. With jobs > 1 the paths are
+    # grouped into chunks (by size_of bytes) and spread over a process pool;
+    # jobs=None uses every core.
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if jobs <= 1:
+        for path in paths:
+            yield func(path)
+        return
+
+    stats = profiling.active()
+    run_chunk = _run_chunk if stats is None else partial(_run_chunk_profiled, top_n=stats.top_n)
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=_pool_context()) as executor:
+        pending = deque()
+        for chunk in _chunk_paths(paths, chunk_bytes, size_of):
+            pending.append(executor.submit(run_chunk, func, chunk))
+            # Keep a bounded number of chunks in flight and hand results back in order.
+            if len(pending) >= jobs * 2:
+                yield from _chunk_results(pending.popleft(), stats)
+        while pending:
+            yield from _chunk_results(pending.popleft(), stats)
+
+def analyze_folder(folder_path, jobs=1, ignore=None):
+    return [file_metrics(record) for record in iter_folder_records(folder_path, jobs, ignore)]
+
+def _cached_records(paths, root, jobs, cache):
+    records, misses = {}, []
+    for path in paths:
+        # A file deleted or made unreadable since the walk is skipped, as uncached.
+        try:
+            record, key = cache.lookup(path)
+        except OSError as e:
+            _report_skipped(path, root, e)
+            continue
+        if record is None:
+            misses.append((path, key))
         else:
-            end = max([node.lineno for node in ast.walk(func) if hasattr(node, 'lineno')], default=start)
-        function_lengths.append(end - start + 1)
-
-    return {
-        "file": os.path.basename(file_path),
-        "line_count": len(content.splitlines()),
-        "function_count": len(functions),
-        "avg_function_length": round(sum(function_lengths) / len(function_lengths), 2) if functions else 0,
-        "max_function_length": max(function_lengths, default=0) if function_lengths else 0
-    }
-
-def analyze_folder(folder_path):
-    result = []
-    for file in os.listdir(folder_path):
-        if file.endswith(".py"):
-            full_path = os.path.join(folder_path, file)
-            if os.path.isfile(full_path):
-                result.append(analyze_python_file(full_path))
-    return result
-
-def get_radon_complexity(file_path):
+            record["file"] = _display_name(path, root)
+            records[path] = record
+    stats = profiling.active()
+    if stats is not None:
+        stats.count("cache_hits", len(records))
+        stats.count("cache_misses", len(misses))
+    # Only files that changed since the last run are parsed again.
+    fresh = map_files(partial(_analyze_or_skip, root=root), [path for path, _ in misses], jobs)
+    for (path, key), record in zip(misses, fresh):
+        if record is not None:
+            cache.store(path, key, record)
+            records[path] = record
+    return [records[path] for path in paths if path in records]
+
+def iter_folder_records(folder_path, jobs=1, ignore=None):
+    # Streams combined records in walk order as soon as each file is analyzed.
+    paths = iter_python_files(folder_path, ignore)
+    records = map_files(partial(_analyze_or_skip, root=folder_path), paths, jobs)
+    return (record for record in records if record is not None)
+
+def analyze_folder_records(folder_path, jobs=1, cache=None, ignore=None):
+    if cache is None:
+        return list(iter_folder_records(folder_path, jobs, ignore))
+    paths = list(iter_python_files(folder_path, ignore))
+    records = _cached_records(paths, folder_path, jobs, cache)
+    cache.prune(folder_path, paths)
+    return records
+
+def feed_records(records, *sinks):
+    # Passes each record to every sink's add() on its way through, so aggregators,
+    # exporters and stores can share one pass over a streamed analysis.
+    for record in records:
+        for sink in sinks:
+            sink.add(record)
+        yield record
+
+def split_records(records):
+    # Splits combined records into the table rows and the per-file complexity map used by the app.
+    result = [file_metrics(record) for record in records]
+    complexity_results = {record["file"]: record["complexity"] for record in records if record["complexity"]}
+    return result, complexity_results
+
+def get_radon_complexity(file_path, source=None):
+    # With source (text or UTF-8 bytes) the code is analyzed in memory and file_path
+    # only names it in error messages; nothing is read from disk. The name predates
+    # the native visitor in complexity.py, whose results match Radon's.
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            code = f.read()
-        complexity_data = cc_visit(code)
-        return [
-            {
-                "name": getattr(item, 'name', 'Unknown'),
-                "complexity": getattr(item, 'complexity', 0),
-                "lineno": getattr(item, 'lineno', 0),
-                "rank": getattr(item, 'rank', 'N/A')
-            }
-            for item in complexity_data
-        ]
+        if source is None:
+            source = _read_source(file_path)
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            source = bytes(source).decode("utf-8")
+        return complexity_blocks(ast.parse(source))
     except Exception as e:
         print(f"Error reading or analyzing {file_path}: {e}")
         return []
 
+def _source_complexity(named_source):
+    return get_radon_complexity(*named_source)
+
+def analyze_sources_complexity(named_sources, jobs=None):
+    # Analyzes (name, source) pairs such as uploaded files concurrently, one per
+    # worker, so a batch takes about as long as its slowest file.
+    named_sources = list(named_sources)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(named_sources))
+    return list(map_files(_source_complexity, named_sources, jobs, chunk_bytes=1,
+                          size_of=lambda named_source: 1))
+
 if __name__ == "__main__":
     from pprint import pprint
 
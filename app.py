@@ -1,10 +1,16 @@
 import streamlit as st
 import os
-import shutil
-from analyzer import analyze_folder, get_radon_complexity
-from report import export_to_csv
-from visualize import plot_metrics, plot_complexity_bar, plot_metrics_interactive
-from pdf_report import create_pdf_report
+import profiling
+from aggregate import StreamingAggregator
+from analyzer import analyze_folder_records, file_metrics, analyze_sources_complexity
+from cache import ResultCache
+from function_table import COLUMNS, RANKS, FunctionTable
+from report import export_to_csv_bytes
+from visualize import (plot_metrics_png, plot_complexity_bar_png, plot_metrics_interactive,
+                       plot_folder_complexity_interactive, plot_length_vs_complexity)
+from pdf_report import create_pdf_report_bytes
+from walker import folder_fingerprint
+from watch import SharedWatchers
 
 def _get_radon_rank_description(rank):
     descriptions = {
@@ -17,12 +23,112 @@ def _get_radon_rank_description(rank):
     }
     return descriptions.get(rank, "Unknown")
 
-# Prepare temporary and output folders
-if os.path.exists("temp_uploaded_files"):
-    shutil.rmtree("temp_uploaded_files")
-os.makedirs("temp_uploaded_files", exist_ok=True)
-
-os.makedirs("output", exist_ok=True)
+def _rank_emoji(rank):
+    if rank in ['D', 'E']:
+        return "⚠️"
+    if rank == 'F':
+        return "❌"
+    return "✅"
+
+# Streamlit reruns this script on every interaction. Folder results and the
+# artifacts built from them are memoized on the folder fingerprint (paths, mtimes
+# and sizes), so reruns and downloads are instant while any file change yields a
+# new key. Entries are bounded in number and age to keep server memory flat.
+CACHE_MAX_ENTRIES = 16
+CACHE_TTL_SECONDS = 60 * 60
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def _analyze_folder_cached(folder, fingerprint, _jobs):
+    # The stats of the run that produced the cached result are cached alongside it.
+    with profiling.collect() as stats:
+        with ResultCache() as cache:
+            records = analyze_folder_records(folder, jobs=_jobs, cache=cache)
+        # Function-level results are kept column-wise rather than as a dict per function.
+        with profiling.stage("table"):
+            result, functions = [file_metrics(record) for record in records], FunctionTable.from_records(records)
+            # Folder-wide aggregates for the PDF report.
+            aggregator = StreamingAggregator()
+            for record in records:
+                aggregator.add(record)
+    return result, functions, aggregator.summary(), stats.to_dict()
+
+# The report builders below only do work on a cache miss, so their stages show up
+# in the Performance panel of the rerun that actually built them.
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def _pdf_report_bytes(folder, fingerprint, _result, _summary):
+    with profiling.stage("pdf"):
+        return create_pdf_report_bytes(_result, _summary)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def _csv_report_bytes(folder, fingerprint, _result):
+    with profiling.stage("csv"):
+        return export_to_csv_bytes(_result)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def _metric_graph_png(folder, fingerprint, _result):
+    with profiling.stage("chart_png"):
+        return plot_metrics_png(_result)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def _metrics_figure(folder, fingerprint, _result):
+    with profiling.stage("chart_interactive"):
+        return plot_metrics_interactive(_result)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def _complexity_figure(folder, fingerprint, _functions):
+    with profiling.stage("chart_complexity"):
+        return plot_folder_complexity_interactive(_functions)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def _scatter_figure(folder, fingerprint, _functions):
+    with profiling.stage("chart_scatter"):
+        return plot_length_vs_complexity(_functions)
+
+def _performance_panel(analysis_stats, report_stats):
+    with st.expander("⏱️ Performance"):
+        st.caption("Analysis (from the run that produced these results; stage times are summed over worker processes)")
+        st.json(analysis_stats, expanded=False)
+        st.caption("Reports and charts built during this rerun (empty when served from the cache)")
+        st.json(report_stats, expanded=False)
+
+PAGE_SIZES = [50, 100, 250, 500]
+
+@st.fragment
+def _function_listing(functions):
+    # Filtering, sorting and paging run here on the server, against the columnar
+    # table, and only the current page is sent to the browser: the payload and the
+    # render time stay the same however many functions the folder has. As a
+    # fragment, changing a filter reruns this listing alone.
+    ranks_column, file_column, complexity_column = st.columns(3)
+    ranks = ranks_column.multiselect("Rank", list(RANKS), default=list(RANKS), key="function_ranks")
+    file_contains = file_column.text_input("File path contains", key="function_file")
+    min_complexity = complexity_column.number_input("Minimum complexity", min_value=0, value=0, step=1, key="function_min_complexity")
+    sort_column, order_column, size_column, page_column = st.columns(4)
+    sort_by = sort_column.selectbox("Sort by", COLUMNS, index=COLUMNS.index("complexity"), key="function_sort")
+    descending = order_column.toggle("Descending", value=True, key="function_descending")
+    page_size = size_column.selectbox("Rows per page", PAGE_SIZES, key="function_page_size")
+
+    indices = functions.select(ranks, file_contains, min_complexity, sort_by, descending)
+    pages = max(1, -(-len(indices) // page_size))
+    # A narrower filter can leave the remembered page past the last one.
+    if st.session_state.get("function_page", 1) > pages:
+        st.session_state["function_page"] = pages
+    page = page_column.number_input("Page", min_value=1, max_value=pages, step=1, key="function_page")
+
+    rows = functions.rows(indices[(page - 1) * page_size:page * page_size])
+    for row in rows:
+        row["risk"] = f"{_rank_emoji(row['rank'])} {_get_radon_rank_description(row['rank'])}"
+    st.dataframe(rows, hide_index=True)
+    st.caption(f"{len(indices)} of {len(functions)} functions, methods and classes – page {page} of {pages}")
+
+LIVE_REFRESH_SECONDS = 2
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def _live_results(watcher):
+    # Only this fragment reruns on the timer; the watcher does the work in the background.
+    records = watcher.records()
+    st.caption(f"Watching '{watcher.folder}' – {len(records)} files, update #{watcher.version}")
+    st.dataframe([file_metrics(record) for record in records])
 
 # Streamlit layout setup
 st.set_page_config(layout="wide")
@@ -31,90 +137,107 @@ st.title("📂 Python Code Quality Analyzer")
 # Section 1: Folder Analysis
 st.header("1. Folder Analysis")
 folder = st.text_input("Enter folder path to analyze:", "target_code", help="Enter the root folder of your project or the folder you want to analyze (e.g., target_code)")
+jobs = st.number_input("Worker processes:", min_value=1, value=os.cpu_count() or 1, step=1, help="Number of processes used to analyze files in parallel")
 
+# Remember the analyzed folder so the results survive the rerun triggered by
+# download buttons and other widgets.
 if st.button("Analyze Folder"):
-    if not os.path.isdir(folder):
-        st.error(f"The folder '{folder}' does not exist or is not valid. Please enter a correct path.")
+    st.session_state["analyzed_folder"] = folder
+
+analyzed_folder = st.session_state.get("analyzed_folder")
+if analyzed_folder is not None:
+    if not os.path.isdir(analyzed_folder):
+        st.error(f"The folder '{analyzed_folder}' does not exist or is not valid. Please enter a correct path.")
     else:
+        fingerprint = folder_fingerprint(analyzed_folder)
         with st.spinner("Analyzing folder... This may take a moment."):
-            result = analyze_folder(folder)
+            result, functions, summary, analysis_stats = _analyze_folder_cached(analyzed_folder, fingerprint, int(jobs))
         if result:
             st.success("Folder analysis completed!")
+            with profiling.collect() as report_stats:
+                pdf_bytes = _pdf_report_bytes(analyzed_folder, fingerprint, result, summary)
+                metrics_figure = _metrics_figure(analyzed_folder, fingerprint, result)
+                complexity_figure = _complexity_figure(analyzed_folder, fingerprint, functions)
+                scatter_figure = _scatter_figure(analyzed_folder, fingerprint, functions)
+                metric_graph = _metric_graph_png(analyzed_folder, fingerprint, result)
+                csv_bytes = _csv_report_bytes(analyzed_folder, fingerprint, result)
 
             # ✅ Generate PDF report
-            create_pdf_report(result)
-            pdf_path = "output/code_analysis_report.pdf"
-            if os.path.exists(pdf_path):
-                with open(pdf_path, "rb") as f:
-                    st.download_button(
-                        label="📄 Download PDF Report",
-                        data=f.read(),
-                        file_name="code_analysis_report.pdf",
-                        mime="application/pdf"
-                    )
+            st.download_button(
+                label="📄 Download PDF Report",
+                data=pdf_bytes,
+                file_name="code_analysis_report.pdf",
+                mime="application/pdf"
+            )
 
             st.subheader("📊 Overall Analysis Results")
             st.write(result)
 
             st.subheader("📊 Interactive Metrics Chart")
-            st.plotly_chart(plot_metrics_interactive(result))
-
-            export_to_csv(result)
-            plot_metrics(result)
+            st.plotly_chart(metrics_figure)
+            # Large folders get aggregated charts (see the thresholds in visualize.py).
+            st.plotly_chart(complexity_figure)
+            st.plotly_chart(scatter_figure)
 
             st.subheader("Charts and Reports")
-            st.image("output/metric_graph.png", caption="Code Quality Metrics Graph")
+            st.image(metric_graph, caption="Code Quality Metrics Graph")
             st.download_button(
                 label="📥 Download Analysis Report (CSV)",
-                data=open("output/analysis_report.csv", "rb").read(),
+                data=csv_bytes,
                 file_name="analysis_report.csv",
                 mime="text/csv"
             )
 
+            _performance_panel(analysis_stats, report_stats.to_dict())
+
             st.subheader("📄 Detailed Function List and Complexity Evaluation")
-            complexity_results = {}
-
-            for file in os.listdir(folder):
-                if file.endswith(".py"):
-                    full_path = os.path.join(folder, file)
-                    if os.path.isfile(full_path):
-                        complexity_data_for_file = get_radon_complexity(full_path)
-                        if complexity_data_for_file:
-                            complexity_results[file] = complexity_data_for_file
-
-            if complexity_results:
-                for file_name, functions_data in complexity_results.items():
-                    st.markdown(f"### 📘 {file_name}")
-                    for func in functions_data:
-                        rank_desc = _get_radon_rank_description(func['rank'])
-                        emoji = "✅"
-                        if func['rank'] in ['D', 'E']:
-                            emoji = "⚠️"
-                        elif func['rank'] == 'F':
-                            emoji = "❌"
-                        st.markdown(
-                            f"- {emoji} `{func['name']}` (line {func['lineno']}) → **Complexity:** {func['complexity']} → **Rank:** {func['rank']} ({rank_desc})"
-                        )
+            if len(functions):
+                _function_listing(functions)
             else:
-                st.info(f"No analyzable functions or classes found in the Python files inside '{folder}'.")
+                st.info(f"No analyzable functions or classes found in the Python files inside '{analyzed_folder}'.")
         else:
-            st.warning(f"No Python files found in '{folder}'. Please make sure the folder contains .py files.")
+            st.warning(f"No Python files found in '{analyzed_folder}'. Please make sure the folder contains .py files.")
+
+# Live mode: sessions watching the same folder share one watcher, which re-analyzes
+# only the files that change on disk. Each session holds a lease on it; the watcher
+# stops once the last lease is released, by the toggle or when its session ends.
+@st.cache_resource
+def _shared_watchers():
+    return SharedWatchers()
+
+if st.toggle("👀 Watch folder for live updates", help="Keep the table below in sync with the folder while you edit files"):
+    lease = st.session_state.get("watcher")
+    if lease is None or lease.folder != folder:
+        if lease is not None:
+            st.session_state.pop("watcher").release()
+        if os.path.isdir(folder):
+            with st.spinner("Running initial scan..."):
+                st.session_state["watcher"] = _shared_watchers().acquire(folder, jobs=int(jobs))
+        else:
+            st.error(f"The folder '{folder}' does not exist or is not valid. Please enter a correct path.")
+    if "watcher" in st.session_state:
+        _live_results(st.session_state["watcher"].watcher)
+elif "watcher" in st.session_state:
+    st.session_state.pop("watcher").release()
 
 # Section 2: Single File Radon Complexity Analysis
 st.header("2. Single File Complexity (Radon) Analysis")
-st.info("This section shows the functional complexity of the selected Python file. High complexity may make code harder to understand and maintain.")
-
-uploaded_file = st.file_uploader("Please select a Python file (.py):", type=["py"])
-
-if uploaded_file is not None:
-    temp_file_path = os.path.join("temp_uploaded_files", uploaded_file.name)
-
-    with open(temp_file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-
-    st.subheader(f"📄 Complexity Analysis for '{uploaded_file.name}'")
-    try:
-        complexity_data = get_radon_complexity(temp_file_path)
+st.info("This section shows the functional complexity of the selected Python files. High complexity may make code harder to understand and maintain.")
+
+uploaded_files = st.file_uploader("Please select Python files (.py):", type=["py"], accept_multiple_files=True)
+
+if uploaded_files:
+    # Uploads are analyzed straight from memory, in parallel; nothing touches the disk.
+    sources = [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files]
+    with st.spinner("Analyzing uploaded files..."):
+        try:
+            upload_results = analyze_sources_complexity(sources, jobs=int(jobs))
+        except Exception as e:
+            st.error(f"An error occurred during Radon analysis: **{e}**. Please make sure your uploaded files are valid Python files with correct syntax.")
+            upload_results = []
+
+    for uploaded_file, complexity_data in zip(uploaded_files, upload_results):
+        st.subheader(f"📄 Complexity Analysis for '{uploaded_file.name}'")
         if complexity_data:
             for block in complexity_data:
                 st.write(
@@ -123,14 +246,7 @@ if uploaded_file is not None:
                     f"({_get_radon_rank_description(block['rank'])})"
                 )
 
-            plot_complexity_bar(complexity_data)
-            st.image("output/complexity_graph.png", caption="Functional Complexity Graph")
+            st.image(plot_complexity_bar_png(complexity_data), caption="Functional Complexity Graph")
 
         else:
             st.warning(f"No functions or classes to analyze in '{uploaded_file.name}'. Please ensure the file contains valid Python code.")
-
-    except Exception as e:
-        st.error(f"An error occurred during Radon analysis: **{e}**. Please make sure your uploaded file is a valid Python file with correct syntax.")
-    finally:
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
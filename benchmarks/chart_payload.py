@@ -0,0 +1,63 @@
+# Measures the size and build time of every chart at growing repository sizes,
+# with the automatic aggregated modes against the former one-bar-per-item
+# charts. Payload is the plotly JSON sent to the browser, or the PNG bytes for the
+# static charts. Results are synthetic, so no analysis run is needed; the
+# one-bar-per-item charts are skipped above --max-bars-files files, since
+# matplotlib takes minutes to lay those out.
+#
+#   python -m benchmarks.chart_payload [--files 100 1000 5000 20000]
+import argparse
+import time
+
+from analyzer import file_metrics
+from benchmarks.corpus import synthetic_records
+from function_table import FunctionTable
+
+def synthetic_results(files):
+    records = synthetic_records(files)
+    return [file_metrics(record) for record in records], FunctionTable.from_records(records)
+
+def measure(build):
+    start = time.perf_counter()
+    output = build()
+    payload = len(output) if isinstance(output, bytes) else len(output.to_json())
+    return payload, time.perf_counter() - start
+
+def charts(rows, functions, unaggregated):
+    from visualize import (plot_folder_complexity_interactive, plot_length_vs_complexity,
+                           plot_metrics_interactive, plot_metrics_png)
+
+    everything = float("inf")
+    yield "metrics_interactive", "auto", lambda: plot_metrics_interactive(rows)
+    if unaggregated:
+        yield "metrics_interactive", "per file", lambda: plot_metrics_interactive(rows, max_bars=everything)
+    yield "metrics_png", "auto", lambda: plot_metrics_png(rows)
+    if unaggregated:
+        yield "metrics_png", "per file", lambda: plot_metrics_png(rows, max_bars=everything)
+    yield "folder_complexity", "auto", lambda: plot_folder_complexity_interactive(functions)
+    yield "folder_complexity", "top", lambda: plot_folder_complexity_interactive(functions, mode="top")
+    if unaggregated:
+        yield "folder_complexity", "bars", lambda: plot_folder_complexity_interactive(functions, mode="bars")
+    yield "length_vs_complexity", "auto", lambda: plot_length_vs_complexity(functions)
+    if unaggregated:
+        yield "length_vs_complexity", "per point", lambda: plot_length_vs_complexity(functions, max_points=everything)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    parser.add_argument("--max-bars-files", type=int, default=1000,
+                        help="largest size at which the one-bar-per-item charts are drawn too")
+    args = parser.parse_args()
+
+    # Warm-up: the chart libraries are imported on first use.
+    for _, _, build in charts(*synthetic_results(10), True):
+        build()
+    print(f"{'files':>7} {'functions':>10}  {'chart':<22}{'mode':<11}{'payload':>12}{'time':>11}")
+    for files in args.files:
+        rows, functions = synthetic_results(files)
+        for chart, mode, build in charts(rows, functions, files <= args.max_bars_files):
+            payload, seconds = measure(build)
+            print(f"{files:>7} {len(functions):>10}  {chart:<22}{mode:<11}{payload / 1024:>9.1f} KB{seconds * 1000:>9.0f} ms")
+
+if __name__ == "__main__":
+    main()
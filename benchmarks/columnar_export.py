@@ -0,0 +1,74 @@
+# Compares the CSV export with the Parquet and Arrow IPC exports of columnar.py
+# for a large synthetic analysis: write time, size on disk and the time to load
+# each table back into pandas (what an ingesting pipeline pays), plus the peak
+# Python memory of writing. The function table has no CSV export of its own; it
+# is written with report.write_csv_rows for the comparison.
+#
+#   python -m benchmarks.columnar_export [files]
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from analyzer import file_metrics
+from benchmarks.corpus import synthetic_records
+from columnar import FORMATS, ColumnarWriter
+from function_table import FunctionTable
+from report import export_to_csv, write_csv_rows
+
+def timed(func):
+    # Timed and traced in separate runs, as tracing slows every allocation down.
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+def write_columnar(records, path, table, format):
+    with ColumnarWriter(path, table, format) as writer:
+        for record in records:
+            writer.add(record)
+
+def read(path):
+    import pandas as pd
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+
+    if path.endswith(".csv"):
+        return pd.read_csv(path)
+    if path.endswith(".parquet"):
+        return pq.read_table(path).to_pandas()
+    with pyarrow.ipc.open_file(path) as reader:
+        return reader.read_all().to_pandas()
+
+def exports(records, root):
+    functions = FunctionTable.from_records(records)
+    yield "files", "csv", os.path.join(root, "files.csv"), lambda path: export_to_csv(
+        [file_metrics(record) for record in records], path)
+    yield "functions", "csv", os.path.join(root, "functions.csv"), lambda path: write_csv_rows(
+        (functions.row(index) for index in range(len(functions))), path)
+    for table in ("files", "functions"):
+        for format, extension in FORMATS.items():
+            yield table, format, os.path.join(root, table + extension), lambda path, table=table, format=format: \
+                write_columnar(records, path, table, format)
+
+def main(files=20_000):
+    records = synthetic_records(files)
+    print(f"files: {files}, functions: {sum(len(record['complexity']) for record in records)}")
+    print(f"{'table':<11}{'format':<9}{'write':>9}{'peak mem':>12}{'size':>11}{'load':>9}")
+    with tempfile.TemporaryDirectory() as root:
+        for table, format, path, write in exports(records, root):
+            seconds, peak = timed(lambda: write(path))
+            start = time.perf_counter()
+            read(path)
+            load = time.perf_counter() - start
+            print(f"{table:<11}{format:<9}{seconds:>8.2f}s{peak / 2**20:>8.1f} MiB"
+                  f"{os.path.getsize(path) / 2**20:>7.1f} MiB{load:>8.2f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:2]]))
@@ -0,0 +1,159 @@
+# Deterministic generator of synthetic Python source trees for benchmarking.
+# The same parameters and seed always produce byte-identical files.
+#
+#   python -m benchmarks.corpus OUT_DIR --files 500 --functions 12 --depth 4
+import argparse
+import os
+import random
+
+DEFAULTS = {
+    "files": 200,
+    "functions": 10,         # functions (or methods) per file
+    "statements": 8,         # top-level statements per function body
+    "depth": 3,              # maximum nesting depth of control flow
+    "branch_density": 0.4,   # probability that a statement opens a nested block
+    "class_ratio": 0.5,      # share of functions that are methods of a class
+    "files_per_package": 50,
+}
+
+_BLOCKS = [
+    "if {var} > {n}:",
+    "for {var} in range({n}):",
+    "while {var} < {n}:",
+    "with open(path) as handle_{n}:",
+    "try:",
+]
+
+class _Writer:
+    def __init__(self, rng, params):
+        self.rng = rng
+        self.params = params
+        self.lines = []
+        self.counter = 0
+
+    def emit(self, indent, text):
+        self.lines.append("    " * indent + text)
+
+    def statements(self, indent, count, depth):
+        for _ in range(count):
+            self.counter += 1
+            n = self.counter
+            if depth < self.params["depth"] and self.rng.random() < self.params["branch_density"]:
+                block = self.rng.choice(_BLOCKS)
+                self.emit(indent, block.format(var="value", n=n))
+                self.statements(indent + 1, self.rng.randint(1, 3), depth + 1)
+                if block == "try:":
+                    self.emit(indent, "except ValueError:")
+                    self.emit(indent + 1, f"value = {n}")
+                elif block.startswith("if") and self.rng.random() < 0.5:
+                    self.emit(indent, f"elif value == {n} and flag or not flag:")
+                    self.emit(indent + 1, f"value -= {n}")
+                    self.emit(indent, "else:")
+                    self.emit(indent + 1, f"value += {n}")
+            elif self.rng.random() < 0.2:
+                self.emit(indent, f"items = [x * {n} for x in range(value) if x % 2]")
+            else:
+                self.emit(indent, f"value = value + {n} if flag else value - {n}")
+
+    def function(self, indent, name, is_method):
+        args = "self, value, flag, path" if is_method else "value, flag, path"
+        self.emit(indent, f"def {name}({args}):")
+        self.emit(indent + 1, f'"""Synthetic function {name}."""')
+        self.statements(indent + 1, self.params["statements"], 0)
+        self.emit(indent + 1, "return value")
+        self.lines.append("")
+
+def generate_source(index, seed=0, **params):
+    params = {**DEFAULTS, **params}
+    rng = random.Random(f"{seed}:{index}")
+    writer = _Writer(rng, params)
+    writer.lines.append(f'"""Synthetic module {index}."""')
+    writer.lines.append("")
+    methods = round(params["functions"] * params["class_ratio"])
+    for number in range(params["functions"] - methods):
+        writer.function(0, f"function_{index}_{number}", False)
+    if methods:
+        writer.lines.append(f"class Synthetic{index}:")
+        for number in range(methods):
+            writer.function(1, f"method_{number}", True)
+    return "\n".join(writer.lines) + "\n"
+
+def nested_source(depth, statements=3):
+    # A pathological module: `depth` functions, each defined inside the previous one
+    # and preceded by a few statements, so the tree is as deep as it is long.
+    lines = []
+    for level in range(depth):
+        indent = " " * level
+        lines.append(f"{indent}def level_{level}(value):")
+        for number in range(statements):
+            lines.append(f"{indent} value = value + {number} if value else {number}")
+    lines.append(" " * depth + "return value")
+    return "\n".join(lines) + "\n"
+
+def generate_corpus(root, seed=0, **params):
+    # Writes the corpus below root and returns the list of file paths.
+    params = {**DEFAULTS, **params}
+    paths = []
+    for index in range(params["files"]):
+        package = os.path.join(root, f"package_{index // params['files_per_package']}")
+        os.makedirs(package, exist_ok=True)
+        path = os.path.join(package, f"module_{index}.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(generate_source(index, seed, **params))
+        paths.append(path)
+    return paths
+
+def synthetic_records(files, seed=0, functions=DEFAULTS["functions"],
+                      files_per_package=DEFAULTS["files_per_package"]):
+    # Analysis records (as analyzer.analyze_file returns them) for `files` files,
+    # made up rather than analyzed, for benchmarks of the report and chart stages
+    # at sizes that would take too long to generate and parse.
+    from complexity import cc_rank
+
+    rng = random.Random(seed)
+    records = []
+    for index in range(files):
+        blocks = []
+        for offset in range(functions):
+            complexity = max(1, int(rng.expovariate(1 / 5)))
+            length = rng.randint(3, 80)
+            volume = round(rng.uniform(10, 40) * length, 2)
+            difficulty = round(rng.uniform(1, 20), 2)
+            blocks.append({
+                "name": f"function_{offset}", "complexity": complexity, "lineno": 1 + offset * 100,
+                "rank": cc_rank(complexity), "qualname": f"function_{offset}", "kind": "function",
+                "endline": offset * 100 + length, "nesting_depth": rng.randint(0, 4),
+                "halstead_volume": volume, "halstead_difficulty": difficulty,
+                "halstead_effort": round(volume * difficulty, 2),
+                "maintainability_index": round(rng.uniform(20, 100), 2),
+            })
+        lengths = [block["endline"] - block["lineno"] + 1 for block in blocks]
+        longest = lengths.index(max(lengths))
+        sloc = sum(lengths) + rng.randint(5, 50)
+        records.append({
+            "file": f"package_{index // files_per_package}/module_{index}.py",
+            "line_count": sloc + 40, "sloc": sloc, "comment_lines": 20, "blank_lines": 20, "docstring_lines": 0,
+            "function_count": functions,
+            "avg_function_length": round(sum(lengths) / functions, 2),
+            "max_function_length": lengths[longest], "longest_function": blocks[longest]["qualname"],
+            "halstead_volume": round(sum(block["halstead_volume"] for block in blocks), 2),
+            "halstead_difficulty": round(rng.uniform(5, 30), 2),
+            "halstead_effort": round(sum(block["halstead_effort"] for block in blocks), 2),
+            "maintainability_index": round(rng.uniform(20, 100), 2),
+            "complexity": blocks,
+        })
+    return records
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.corpus", description="Generate a synthetic Python corpus.")
+    parser.add_argument("root", help="output directory")
+    parser.add_argument("--seed", type=int, default=0)
+    for name, value in DEFAULTS.items():
+        parser.add_argument("--" + name.replace("_", "-"), type=type(value), default=value)
+    args = vars(parser.parse_args(argv))
+    root, seed = args.pop("root"), args.pop("seed")
+    paths = generate_corpus(root, seed, **args)
+    print(f"wrote {len(paths)} files to {root}")
+
+if __name__ == "__main__":
+    main()
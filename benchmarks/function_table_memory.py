@@ -0,0 +1,57 @@
+# Compares the memory held by the {file: [block dict, ...]} representation of
+# complexity results with the columnar FunctionTable for the same functions.
+#
+#   python -m benchmarks.function_table_memory [functions]
+import random
+import sys
+import tracemalloc
+
+from function_table import FunctionTable
+
+FUNCTIONS_PER_FILE = 20
+REQUIRED_RATIO = 5
+
+def _records(count, seed=0):
+    # Fresh string objects per block, as a real parse would produce them.
+    rng = random.Random(seed)
+    for file_index in range(0, count, FUNCTIONS_PER_FILE):
+        blocks = []
+        for offset in range(min(FUNCTIONS_PER_FILE, count - file_index)):
+            lineno = 1 + offset * 12
+            complexity = rng.randint(1, 45)
+            blocks.append({
+                "name": f"function_{offset}",
+                "complexity": complexity,
+                "lineno": lineno,
+                "rank": "ABCDEF"[min(complexity // 6, 5)],
+                "qualname": f"Class{offset % 3}.function_{offset}",
+                "kind": "method",
+                "endline": lineno + rng.randint(2, 11),
+                "nesting_depth": rng.randint(0, 5),
+                "halstead_volume": round(rng.uniform(0, 500), 2),
+                "halstead_difficulty": round(rng.uniform(0, 20), 2),
+                "halstead_effort": round(rng.uniform(0, 10000), 2),
+                "maintainability_index": round(rng.uniform(0, 100), 2),
+            })
+        yield {"file": f"pkg/module_{file_index // FUNCTIONS_PER_FILE}.py", "complexity": blocks}
+
+def measure(build, count):
+    tracemalloc.start()
+    kept = build(_records(count))
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return size
+
+def main(count=200_000):
+    dicts = measure(lambda records: {record["file"]: record["complexity"] for record in records}, count)
+    table = measure(FunctionTable.from_records, count)
+    ratio = dicts / table
+    print(f"functions:     {count}")
+    print(f"dict of lists: {dicts / 2**20:8.1f} MiB")
+    print(f"FunctionTable: {table / 2**20:8.1f} MiB")
+    print(f"reduction:     {ratio:.1f}x (required {REQUIRED_RATIO}x)")
+    return 0 if ratio >= REQUIRED_RATIO else 1
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:2]]))
@@ -0,0 +1,84 @@
+# Checks that the Halstead counts taken during complexity.function_metrics give
+# exactly the reports of Radon's h_visit, per file and per function, and compares
+# the maintainability index with Radon's mi_visit. The index is not expected to
+# match exactly: it counts logical lines from the AST (statements plus else,
+# except and finally clauses), where Radon counts tokenized lines and treats any
+# line with a ':' in it as two. The regression corpus is target_code/, the edge
+# cases of benchmarks.radon_parity and a synthetic corpus; extra folders can be
+# passed as arguments.
+#
+#   python -m benchmarks.halstead_parity [folder ...]
+import ast
+import sys
+import tempfile
+import time
+
+from analyzer import analyze_source
+from benchmarks.corpus import generate_corpus
+from benchmarks.radon_parity import EDGE_CASES
+from complexity import function_metrics
+from halstead import halstead_report, radon_halstead
+from walker import iter_python_files
+
+def compare(name, source):
+    tree = ast.parse(source)
+    expected_total, expected_functions = radon_halstead(tree)
+    _, total, functions = function_metrics(tree)
+    actual_functions = [halstead_report(counts) for counts in functions.values()]
+    if halstead_report(total) != expected_total:
+        print(f"MISMATCH {name} (file):\n  radon:  {expected_total}\n  native: {halstead_report(total)}")
+        return False
+    for (function, want), got in zip(expected_functions, actual_functions):
+        if want != got:
+            print(f"MISMATCH {name} ({function}):\n  radon:  {want}\n  native: {got}")
+            return False
+    if len(expected_functions) != len(actual_functions):
+        print(f"MISMATCH {name}: {len(expected_functions)} radon functions, {len(actual_functions)} native")
+        return False
+    return True
+
+def best_of(func, sources, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for source in sources:
+            func(source)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def radon_metrics(source):
+    # What the Halstead and MI columns would cost through Radon: two more parses.
+    from radon.metrics import h_visit, mi_visit
+
+    h_visit(source)
+    return mi_visit(source, True)
+
+def main(*folders):
+    sources = {"<edge cases>": EDGE_CASES}
+    with tempfile.TemporaryDirectory() as root:
+        generate_corpus(root, files=60)
+        for folder in ("target_code", root) + folders:
+            for path in iter_python_files(folder):
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    source = f.read()
+                try:
+                    ast.parse(source)
+                except (SyntaxError, ValueError):
+                    continue
+                sources[path] = source
+
+    failures = sum(not compare(name, source) for name, source in sources.items())
+    differences = [
+        abs(analyze_source(source, name)["maintainability_index"] - radon_metrics(source))
+        for name, source in sources.items()
+    ]
+    native = best_of(lambda source: analyze_source(source, "module.py"), sources.values())
+    radon = best_of(radon_metrics, sources.values())
+    print(f"files:            {len(sources)} ({failures} Halstead mismatches)")
+    print(f"MI vs mi_visit:   mean |diff| {sum(differences) / len(differences):.2f}, max {max(differences):.2f}")
+    print(f"analyze_source:   {native * 1000:.2f} ms (all metrics)")
+    print(f"radon h+mi_visit: {radon * 1000:.2f} ms (Halstead and MI alone)")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
@@ -0,0 +1,53 @@
+# Guards the import cost of the modules app.py and the CLI load on every run.
+# Runs a fresh interpreter under `python -X importtime`, reports the cumulative
+# import time of each module and fails if a heavy dependency is pulled in eagerly
+# or a module exceeds its budget.
+#
+#   python -m benchmarks.import_time
+import subprocess
+import sys
+
+# Cumulative import budget per module, in milliseconds.
+BUDGETS_MS = {
+    "visualize": 5,
+    "report": 5,
+    "pdf_report": 5,
+    "analyzer": 150,
+    "cli": 150,
+}
+
+# Must only be imported when a chart or export is actually requested.
+HEAVY_MODULES = ["matplotlib", "plotly", "pandas", "fpdf", "streamlit"]
+
+def import_times(module):
+    # Returns {module name: cumulative microseconds} for everything imported by `module`.
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        times[name] = int(cumulative)
+    return times
+
+def main():
+    failures = []
+    for module, budget in BUDGETS_MS.items():
+        times = import_times(module)
+        elapsed = times.get(module, 0) / 1000
+        heavy = sorted({name.split(".")[0] for name in times} & set(HEAVY_MODULES))
+        status = "ok"
+        if heavy:
+            status = "eager import of " + ", ".join(heavy)
+        elif elapsed > budget:
+            status = f"over budget ({budget} ms)"
+        if status != "ok":
+            failures.append(module)
+        print(f"{module:<12} {elapsed:8.2f} ms  {status}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# Checks that line_metrics.line_counts classifies lines exactly like the
+# tokenize-based reference, and compares the cost of both with the rest of the
+# per-file analysis (analyzer.analyze_source). Runs on target_code/, a set of edge
+# cases, a synthetic corpus and any extra folders given.
+#
+#   python -m benchmarks.line_counts [folder ...]
+import ast
+import sys
+import tempfile
+import time
+
+from analyzer import analyze_source
+from benchmarks.corpus import generate_corpus
+from line_metrics import line_counts, tokenize_line_counts
+from walker import iter_python_files
+
+EDGE_CASES = '''\
+"""Module docstring."""; import os
+
+def one_line(): """Header and docstring."""; return 1
+
+def followed():
+    """Docstring followed by a statement."""; value = 1  # comment
+    return value
+
+class Multi:
+    r"""Raw docstring
+    over two lines.""" ;
+    text = """not a
+    docstring"""; """nor
+    this"""
+
+    def prefixed(self):
+        b"""Bytes are no docstring."""
+
+    def method(
+        self,
+    ):
+        """After a multi-line header."""
+'''
+
+def best_of(func, sources, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for name, source in sources:
+            func(source)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main(*folders):
+    sources = [("<edge cases>", EDGE_CASES)]
+    with tempfile.TemporaryDirectory() as root:
+        generate_corpus(root, files=60)
+        for folder in ("target_code", root) + folders:
+            for path in iter_python_files(folder):
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    source = f.read()
+                try:
+                    ast.parse(source)
+                except (SyntaxError, ValueError):
+                    continue
+                sources.append((path, source))
+
+    failures = 0
+    for name, source in sources:
+        expected, actual = tokenize_line_counts(source), line_counts(source)
+        if actual != expected:
+            failures += 1
+            print(f"MISMATCH {name}:\n  tokenize: {expected}\n  fast:     {actual}")
+
+    analysis = best_of(lambda source: analyze_source(source, "module.py"), sources)
+    fast = best_of(line_counts, sources)
+    reference = best_of(tokenize_line_counts, sources)
+    print(f"files:          {len(sources)} ({failures} mismatches)")
+    print(f"analyze_source: {analysis * 1000:.2f} ms")
+    print(f"line_counts:    {fast * 1000:.2f} ms (+{fast / analysis:.1%})")
+    print(f"tokenize:       {reference * 1000:.2f} ms (+{reference / analysis:.1%})")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
@@ -0,0 +1,96 @@
+# Fills a metrics store (store.py) with synthetic runs of several repositories,
+# then times the bulk insert and the indexed queries of the query API. Fails (exit
+# code 1) when a query takes longer than REQUIRED_MS; each query's plan is
+# printed, so a missing index shows up as a SCAN. Every shape in SHAPES is run
+# unless one is picked: large runs of a few repositories, and small runs of many
+# repositories with a history (where a query must not pay for the older runs).
+#
+#   python -m benchmarks.metrics_store [--shape NAME | --files 20000 --repos 10 --runs 2] [--store PATH]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import synthetic_records
+from store import MetricsStore
+
+REQUIRED_MS = 50
+
+SHAPES = {
+    "few repos": {"files": 20_000, "repos": 10, "runs": 2},
+    "many runs": {"files": 1_000, "repos": 100, "runs": 4},
+}
+
+QUERIES = {
+    "rank F": {"ranks": "F"},
+    "rank A, most complex": {"ranks": "A"},
+    "rank D-F in one repo": {"ranks": "DEF", "repo": "repo_3"},
+    "complexity >= 40": {"min_complexity": 40},
+    "path prefix": {"path_prefix": "package_7/"},
+    "lowest MI in one repo": {"repo": "repo_5", "order_by": "maintainability_index", "descending": False},
+    "rank F, all runs": {"ranks": "F", "latest": False},
+}
+
+def fill(store, files, repos, runs):
+    inserted, seconds = 0, 0.0
+    for run in range(runs):
+        for repo in range(repos):
+            records = synthetic_records(files, seed=run * repos + repo)
+            start = time.perf_counter()
+            store.add_run(records, f"repo_{repo}", f"/src/repo_{repo}")
+            seconds += time.perf_counter() - start
+            inserted += sum(len(record["complexity"]) for record in records)
+    return inserted, seconds
+
+def best_ms(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+def run_shape(path, files, repos, runs):
+    # Returns the number of queries slower than REQUIRED_MS.
+    with MetricsStore(path) as store:
+        if not store.repos():
+            inserted, seconds = fill(store, files, repos, runs)
+            print(f"inserted {inserted} functions in {seconds:.1f} s ({inserted / seconds:,.0f} rows/s)")
+        functions = store._conn.execute("SELECT COUNT(*) FROM functions").fetchone()[0]
+        print(f"store: {functions} functions, {os.path.getsize(path) / 2**20:.0f} MiB")
+        failures = 0
+        for name, filters in QUERIES.items():
+            ms = best_ms(lambda: store.functions(**filters))
+            failures += ms > REQUIRED_MS
+            print(f"{name:<24}{ms:>9.2f} ms  {'; '.join(store.query_plan(**filters))}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shape", choices=list(SHAPES), help="run only this shape")
+    parser.add_argument("--files", type=int, help="files per repository run (a custom shape)")
+    parser.add_argument("--repos", type=int)
+    parser.add_argument("--runs", type=int, help="runs per repository")
+    parser.add_argument("--store", help="reuse (or create) the store at this path instead of a temporary one")
+    args = parser.parse_args()
+
+    shapes = SHAPES if args.shape is None else {args.shape: SHAPES[args.shape]}
+    if args.files or args.repos or args.runs:
+        shape = dict(SHAPES["few repos"])
+        shape.update((key, getattr(args, key)) for key in shape if getattr(args, key))
+        shapes = {"custom": shape}
+    if args.store and len(shapes) > 1:
+        parser.error("--store holds one shape; pick it with --shape or --files/--repos/--runs")
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as root:
+        for name, shape in shapes.items():
+            print(f"{name}: {shape['repos']} repos x {shape['runs']} runs x {shape['files']} files")
+            path = args.store or os.path.join(root, name.replace(" ", "_") + ".sqlite")
+            failures += run_shape(path, **shape)
+    print(f"required: every query under {REQUIRED_MS} ms")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+# Times the function-size metrics on a pathologically nested generated module,
+# comparing complexity.function_spans with the former ast.walk implementation. The
+# trees are also run without end_lineno, which sent the former implementation into
+# a full re-walk of every function: quadratic for deeply nested code.
+#
+#   python -m benchmarks.nested_functions [depth] [statements per level]
+import ast
+import sys
+import time
+
+from complexity import function_spans
+from benchmarks.corpus import nested_source
+
+def legacy_lengths(tree):
+    functions = [node for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)]
+    lengths = []
+    for func in functions:
+        # Originally hasattr(); end_lineno is an optional attribute and reads as None when stripped.
+        if getattr(func, 'end_lineno', None) is not None:
+            end = func.end_lineno
+        else:
+            end = max([node.lineno for node in ast.walk(func) if hasattr(node, 'lineno')], default=func.lineno)
+        lengths.append(end - func.lineno + 1)
+    return lengths
+
+def span_lengths(tree):
+    return [end - start + 1 for _, start, end in function_spans(tree)]
+
+def strip_end_lines(tree):
+    for node in ast.walk(tree):
+        if getattr(node, "end_lineno", None) is not None:
+            del node.end_lineno
+    return tree
+
+def timed(func, tree):
+    start = time.perf_counter()
+    result = func(tree)
+    return time.perf_counter() - start, result
+
+def main(depth=99, statements=100):
+    # The tokenizer allows at most 100 levels of indentation.
+    source = nested_source(depth, statements)
+    print(f"depth {depth}, {source.count(chr(10))} lines")
+    for label, tree in (("with end_lineno", ast.parse(source)), ("without end_lineno", strip_end_lines(ast.parse(source)))):
+        old, old_lengths = timed(legacy_lengths, tree)
+        new, new_lengths = timed(span_lengths, tree)
+        assert sorted(old_lengths) == sorted(new_lengths), "function lengths differ"
+        print(f"{label:<20} ast.walk: {old * 1000:9.2f} ms   function_spans: {new * 1000:8.2f} ms   ({old / new:.1f}x)")
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
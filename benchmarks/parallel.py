@@ -0,0 +1,26 @@
+# Compares serial folder analysis with the process-pool mode.
+#
+#   python -m benchmarks.parallel [folder] [jobs]
+import os
+import sys
+import time
+
+from analyzer import analyze_folder_records
+
+def timed(folder, jobs):
+    start = time.perf_counter()
+    records = analyze_folder_records(folder, jobs=jobs)
+    return time.perf_counter() - start, records
+
+def main(folder="target_code", jobs=None):
+    jobs = jobs or os.cpu_count() or 1
+    serial, serial_records = timed(folder, 1)
+    parallel, parallel_records = timed(folder, jobs)
+    assert serial_records == parallel_records, "parallel results differ from serial results"
+    print(f"files:    {len(serial_records)}")
+    print(f"serial:   {serial * 1000:.2f} ms")
+    print(f"jobs={jobs}: {parallel * 1000:.2f} ms")
+    print(f"speedup:  {serial / parallel:.2f}x")
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2], *[int(arg) for arg in sys.argv[2:3]])
@@ -0,0 +1,42 @@
+# Times the PDF report for a large synthetic repository: the summary sections,
+# the package rollup, the in-memory charts and the capped file table, built from
+# the file rows and the StreamingAggregator summary the CLI and the app pass in.
+# Fails (exit code 1) when building the report takes longer than REQUIRED_SECONDS.
+#
+#   python -m benchmarks.pdf_report [files]
+import sys
+import time
+
+from aggregate import StreamingAggregator
+from analyzer import file_metrics
+from benchmarks.corpus import synthetic_records
+
+REQUIRED_SECONDS = 3.0
+
+def build(rows, summary, charts=True):
+    from pdf_report import create_pdf_report_bytes
+
+    start = time.perf_counter()
+    data = create_pdf_report_bytes(rows, summary, charts)
+    return data, time.perf_counter() - start
+
+def main(files=50_000):
+    records = synthetic_records(files)
+    aggregator = StreamingAggregator()
+    for record in records:
+        aggregator.add(record)
+    rows, summary = [file_metrics(record) for record in records], aggregator.summary()
+    del records
+
+    # Warm-up: fpdf and matplotlib are imported on first use.
+    build(rows[:10], summary)
+    data, seconds = build(rows, summary)
+    _, tables = build(rows, summary, charts=False)
+    print(f"files:        {files}")
+    print(f"report:       {len(data) / 1024:.0f} KB")
+    print(f"tables only:  {tables:.2f} s")
+    print(f"with charts:  {seconds:.2f} s (required under {REQUIRED_SECONDS:.0f} s)")
+    return 0 if seconds < REQUIRED_SECONDS else 1
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:2]]))
@@ -0,0 +1,157 @@
+# Checks that the native complexity visitor (complexity.complexity_blocks) gives
+# exactly the blocks of the Radon-based reference implementation, and compares
+# their speed. The regression corpus is target_code/, a set of edge cases and
+# synthetic corpora of several shapes; extra folders can be passed as arguments.
+#
+#   python -m benchmarks.radon_parity [folder ...]
+import ast
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generate_corpus
+from complexity import complexity_blocks, radon_complexity_blocks
+from walker import iter_python_files
+
+SHAPES = [
+    {"files": 60},
+    {"files": 30, "depth": 6, "branch_density": 0.8},
+    {"files": 30, "functions": 20, "class_ratio": 1.0},
+    {"files": 30, "statements": 30, "class_ratio": 0.0, "branch_density": 0.2},
+]
+
+EDGE_CASES = '''
+import functools
+
+@functools.lru_cache(maxsize=None if True else 1)
+def decorated(x=1 if True else 2):
+    assert x and x > 0, "positive"
+    return [y for y in range(x) if y if y % 2] or {y: y for y in range(3)}
+
+async def fetch(items):
+    async for item in items:
+        async with item:
+            pass
+    else:
+        return None
+
+def outer(values):
+    def inner(value):
+        return value if value else 0
+    class Local:
+        def method(self):
+            return 1 if self else 2
+    while values:
+        values.pop()
+    else:
+        values = None
+    try:
+        pass
+    except ValueError:
+        pass
+    except (KeyError, TypeError):
+        pass
+    else:
+        pass
+    finally:
+        pass
+    key = lambda item: item.a or item.b and item.c
+    match values:
+        case [first, *rest] if first:
+            return first
+        case {"key": value} | {"other": value}:
+            return value
+        case None:
+            return None
+        case _:
+            return key
+    return inner
+
+class Base:
+    attribute = 1 if True else 2
+    if attribute:
+        def conditional(self):
+            return self
+    else:
+        def conditional(self):
+            return None
+
+    class Inner:
+        def hidden(self):
+            return 1 if self else 0
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, new):
+        if new:
+            self._value = new
+
+class Empty:
+    pass
+
+class Single:
+    def only(self):
+        for i in range(3):
+            if i:
+                break
+        return 1
+
+if __name__ == "__main__":
+    def script_main():
+        return 0
+'''
+
+def compare(name, source):
+    tree = ast.parse(source)
+    expected = radon_complexity_blocks(tree)
+    actual = complexity_blocks(tree)
+    if actual != expected:
+        for index, (want, got) in enumerate(zip(expected, actual)):
+            if want != got:
+                print(f"MISMATCH {name} block {index}:\n  radon:  {want}\n  native: {got}")
+                break
+        else:
+            print(f"MISMATCH {name}: {len(expected)} radon blocks, {len(actual)} native blocks")
+        return False
+    return True
+
+def best_of(func, trees, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for tree in trees:
+            func(tree)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main(*folders):
+    sources = {"<edge cases>": EDGE_CASES}
+    with tempfile.TemporaryDirectory() as root:
+        for index, shape in enumerate(SHAPES):
+            generate_corpus(os.path.join(root, f"shape_{index}"), seed=index, **shape)
+        for folder in ("target_code", root) + folders:
+            for path in iter_python_files(folder):
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    source = f.read()
+                try:
+                    ast.parse(source)
+                except (SyntaxError, ValueError):
+                    continue
+                sources[path] = source
+
+    failures = sum(not compare(name, source) for name, source in sources.items())
+    trees = [ast.parse(source) for source in sources.values()]
+    radon = best_of(radon_complexity_blocks, trees)
+    native = best_of(complexity_blocks, trees)
+    print(f"files:   {len(sources)} ({failures} mismatches)")
+    print(f"radon:   {radon * 1000:.2f} ms")
+    print(f"native:  {native * 1000:.2f} ms")
+    print(f"speedup: {radon / native:.2f}x")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
@@ -0,0 +1,218 @@
+# Benchmark suite for the hot paths, run against a synthetic corpus from
+# benchmarks.corpus. Each benchmark reports the best of `--repeat` runs; results
+# are compared with benchmarks/baseline.json and any benchmark slower than the
+# baseline by more than `--tolerance` is reported as a regression (exit code 1).
+#
+#   python -m benchmarks.run                    # compare with the baseline
+#   python -m benchmarks.run --save-baseline    # record a new baseline
+#   python -m benchmarks.run -k export --files 500
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import DEFAULTS, generate_corpus
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.3
+
+BENCHMARKS = {}
+
+def benchmark(func):
+    BENCHMARKS[func.__name__] = func
+    return func
+
+class Context:
+    # Shared inputs, built once: the corpus on disk plus the analysis results the
+    # export and chart benchmarks start from (so they time only the export itself).
+
+    def __init__(self, root, paths):
+        from aggregate import StreamingAggregator
+        from analyzer import analyze_folder_records, split_records
+        from function_table import FunctionTable
+
+        self.root = root
+        self.paths = paths
+        self.records = analyze_folder_records(root)
+        self.result, self.complexity_results = split_records(self.records)
+        self.largest_blocks = max(self.complexity_results.values(), key=len)
+        self.functions = FunctionTable.from_records(self.records)
+        aggregator = StreamingAggregator()
+        for record in self.records:
+            aggregator.add(record)
+        self.summary = aggregator.summary()
+        self.out = os.path.join(root, "out")
+        os.makedirs(self.out, exist_ok=True)
+
+@benchmark
+def analyze_python_file(ctx):
+    from analyzer import analyze_python_file
+
+    for path in ctx.paths:
+        analyze_python_file(path, ctx.root)
+
+@benchmark
+def get_radon_complexity(ctx):
+    from analyzer import get_radon_complexity
+
+    for path in ctx.paths:
+        get_radon_complexity(path)
+
+@benchmark
+def analyze_folder(ctx):
+    from analyzer import analyze_folder
+
+    analyze_folder(ctx.root)
+
+@benchmark
+def analyze_folder_records(ctx):
+    from analyzer import analyze_folder_records
+
+    analyze_folder_records(ctx.root)
+
+@benchmark
+def analyze_folder_parallel(ctx):
+    from analyzer import analyze_folder
+
+    analyze_folder(ctx.root, jobs=os.cpu_count() or 1)
+
+@benchmark
+def analyze_folder_instrumented(ctx):
+    # Same as analyze_folder with profiling stats collected; compare the two for the overhead.
+    import profiling
+    from analyzer import analyze_folder_records
+
+    with profiling.collect():
+        analyze_folder_records(ctx.root)
+
+@benchmark
+def export_csv(ctx):
+    from report import export_to_csv
+
+    export_to_csv(ctx.result, os.path.join(ctx.out, "report.csv"))
+
+@benchmark
+def export_pdf(ctx):
+    from pdf_report import create_pdf_report_bytes
+
+    # Without the embedded charts, which the chart_* benchmarks time.
+    create_pdf_report_bytes(ctx.result, ctx.summary, charts=False)
+
+@benchmark
+def chart_metrics_png(ctx):
+    from visualize import plot_metrics_png
+
+    plot_metrics_png(ctx.result)
+
+@benchmark
+def chart_complexity_png(ctx):
+    from visualize import plot_complexity_bar_png
+
+    plot_complexity_bar_png(ctx.largest_blocks)
+
+@benchmark
+def chart_metrics_interactive(ctx):
+    from visualize import plot_metrics_interactive
+
+    plot_metrics_interactive(ctx.result).to_json()
+
+@benchmark
+def chart_folder_complexity_interactive(ctx):
+    from visualize import plot_folder_complexity_interactive
+
+    plot_folder_complexity_interactive(ctx.complexity_results).to_json()
+
+@benchmark
+def function_listing_page(ctx):
+    # One rerun of the app's function listing: filter, sort, then build a page of rows.
+    indices = ctx.functions.select(ranks="BCDEF", file_contains="package", min_complexity=3,
+                                   sort_by="name", descending=True)
+    ctx.functions.rows(indices[:100])
+
+def best_of(func, ctx, repeat):
+    func(ctx)  # warm-up: lazy imports, page cache
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(ctx)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def load_baseline(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def compare(results, baseline, tolerance):
+    # Returns the names of benchmarks that got slower than the baseline allows.
+    regressions = []
+    print(f"{'benchmark':<38}{'baseline':>12}{'current':>12}{'ratio':>9}")
+    for name, seconds in results.items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            print(f"{name:<38}{'-':>12}{seconds * 1000:>10.2f}ms{'new':>9}")
+            continue
+        ratio = seconds / reference
+        flag = "  REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{name:<38}{reference * 1000:>10.2f}ms{seconds * 1000:>10.2f}ms{ratio:>8.2f}x{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Run the benchmark suite.")
+    parser.add_argument("-k", dest="pattern", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown against the baseline (default: %(default)s)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--seed", type=int, default=0)
+    for name, value in DEFAULTS.items():
+        parser.add_argument("--" + name.replace("_", "-"), type=type(value), default=value)
+    args = parser.parse_args(argv)
+    corpus = {name: getattr(args, name) for name in DEFAULTS}
+
+    names = [name for name in BENCHMARKS if not args.pattern or args.pattern in name]
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        paths = generate_corpus(root, args.seed, **corpus)
+        ctx = Context(root, paths)
+        print(f"corpus: {len(paths)} files, {sum(record['line_count'] for record in ctx.records)} lines")
+        for name in names:
+            results[name] = best_of(BENCHMARKS[name], ctx, args.repeat)
+
+    if args.save_baseline:
+        baseline = load_baseline(args.baseline) or {"results": {}}
+        baseline.update({"environment": environment(), "corpus": corpus, "seed": args.seed})
+        baseline["results"].update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        for name, seconds in results.items():
+            print(f"{name:<38}{seconds * 1000:>10.2f}ms")
+        return 0
+    if baseline.get("corpus") != corpus or baseline.get("seed") != args.seed:
+        print("warning: corpus parameters differ from the baseline's; ratios are not comparable")
+    return 1 if compare(results, baseline, args.tolerance) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
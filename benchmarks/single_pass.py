@@ -0,0 +1,57 @@
+# Compares the original two-pass flow with the single-pass analyze_file engine.
+# The two-pass flow is pinned here as it was before the engine existed: one read
+# and parse for the function sizes, then a second read for Radon's cc_visit
+# (Radon stays installed as the reference implementation). analyzer's own
+# functions all run the single-pass analysis now, so they cannot stand in for it.
+#
+#   python -m benchmarks.single_pass [folder] [repeat]
+import ast
+import sys
+import time
+
+from analyzer import analyze_file
+from walker import iter_python_files
+
+def _old_size_metrics(path):
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    tree = ast.parse(content)
+    functions = [node for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)]
+    lengths = [node.end_lineno - node.lineno + 1 for node in functions]
+    return len(content.splitlines()), len(functions), max(lengths, default=0)
+
+def _old_complexity(path):
+    from radon.complexity import cc_visit
+
+    with open(path, "r", encoding="utf-8") as f:
+        code = f.read()
+    return [(block.name, block.complexity, block.lineno) for block in cc_visit(code)]
+
+def two_pass(paths):
+    for path in paths:
+        _old_size_metrics(path)
+        _old_complexity(path)
+
+def single_pass(paths):
+    for path in paths:
+        analyze_file(path)
+
+def best_of(func, paths, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(paths)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main(folder="target_code", repeat=20):
+    paths = list(iter_python_files(folder))
+    old = best_of(two_pass, paths, repeat)
+    new = best_of(single_pass, paths, repeat)
+    print(f"files:       {len(paths)}")
+    print(f"two-pass:    {old * 1000:.2f} ms")
+    print(f"single-pass: {new * 1000:.2f} ms")
+    print(f"speedup:     {old / new:.2f}x")
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2], *[int(arg) for arg in sys.argv[2:3]])
@@ -0,0 +1,77 @@
+# Checks that the streaming pipeline (aggregate.stream_folder_report) analyzes a
+# folder in bounded memory. One untraced warm-up pass takes the one-off costs
+# (imports, caches) out of the measurements; then the tracemalloc peak is taken
+# for a corpus and for one four times larger, and the extra files may add at
+# most MAX_BYTES_PER_FILE each to it. Anything kept per file (a list of rows, a
+# dict of paths) costs far more than that and fails the check.
+#
+# The default corpora (5k and 20k files) take about a minute. The pipeline is
+# meant to hold the same ceiling for a 1M-file tree; pass 250000 to measure
+# that (about 40 minutes, 4 GiB of files).
+#
+#   python -m benchmarks.streaming_memory [files]
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from aggregate import stream_folder_report
+
+MAX_BYTES_PER_FILE = 8
+
+# Files differ only in literals. Each distinct identifier CPython parses stays
+# interned, so unique class or function names per file would make the
+# interpreter's own table grow with the corpus (bounded by the distinct names of a
+# real tree, not by its size).
+SOURCE = '''
+class Worker:
+    def run(self, items):
+        total = 0
+        for item in items:
+            if item % 3 == 0 and item > {index}:
+                total += item
+            elif item % 5 == 0:
+                total -= 1
+        return total
+
+def helper(value):
+    return value * 2 if value else {index}
+'''
+
+def write_corpus(root, files):
+    # 100 files per package directory, as in a real source tree.
+    for index in range(files):
+        package = os.path.join(root, f"pkg_{index // 100}")
+        os.makedirs(package, exist_ok=True)
+        with open(os.path.join(package, f"module_{index}.py"), "w", encoding="utf-8") as f:
+            f.write(SOURCE.format(index=index))
+
+def run(root, csv_path, files):
+    aggregator = stream_folder_report(root, csv_path)
+    assert aggregator.files == files
+
+def peak_memory(root, csv_path, files):
+    tracemalloc.start()
+    run(root, csv_path, files)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def main(files=5000):
+    # The corpus is four parts of `files` files: the first part alone, then all of them.
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as output:
+        for part in range(4):
+            write_corpus(os.path.join(root, f"part_{part}"), files)
+        csv_path = os.path.join(output, "report.csv")
+        small = os.path.join(root, "part_0")
+        run(small, csv_path, files)
+        base = peak_memory(small, csv_path, files)
+        grown = peak_memory(root, csv_path, files * 4)
+    per_file = (grown - base) / (files * 3)
+    print(f"{files:>8} files: peak {base / 2**20:6.2f} MiB")
+    print(f"{files * 4:>8} files: peak {grown / 2**20:6.2f} MiB")
+    print(f"growth: {per_file:.2f} bytes per extra file (allowed {MAX_BYTES_PER_FILE})")
+    return 0 if per_file <= MAX_BYTES_PER_FILE else 1
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:2]]))
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from analyzer import ANALYZER_VERSION
+
+DEFAULT_CACHE_PATH = "output/analysis_cache.sqlite"
+DEFAULT_MAX_ENTRIES = 200_000
+
+# Writes are buffered and committed in short transactions of up to this many rows,
+# so a long analysis never holds the write lock other sessions are waiting for.
+FLUSH_ROWS = 500
+BUSY_TIMEOUT_SECONDS = 30
+
+# Entries written by a different analyzer version are discarded on open.
+CACHE_VERSION = f"analyzer-{ANALYZER_VERSION}"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    record TEXT NOT NULL,
+    last_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_content_hash ON results (content_hash);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+def _content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ResultCache:
+    # Persistent store of analyzer.analyze_file records. A file is a hit when its
+    # path, mtime and size match a stored entry; otherwise its content hash is
+    # checked so that touched-but-unchanged or copied files are not re-parsed.
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_entries = max_entries
+        # Autocommit: reads take no lock, and every write goes through _flush. With
+        # WAL, readers never block the writer, and a busy writer is waited for.
+        self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(_SCHEMA)
+        self._check_version()
+        # Rows to write ({key: row}) and last_used touches ({key: time}), pending until _flush.
+        self._rows = {}
+        self._touched = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._flush()
+        self._conn.close()
+
+    def _check_version(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != CACHE_VERSION:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM results")
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (CACHE_VERSION,))
+            self._conn.execute("COMMIT")
+
+    def _write(self, key, row):
+        self._rows[key] = row
+        self._touched.pop(key, None)
+        if len(self._rows) + len(self._touched) >= FLUSH_ROWS:
+            self._flush()
+
+    def _touch(self, key, now):
+        if key not in self._rows:
+            self._touched[key] = now
+            if len(self._rows) + len(self._touched) >= FLUSH_ROWS:
+                self._flush()
+
+    def _flush(self):
+        # One short write transaction for everything buffered since the last flush.
+        if not self._rows and not self._touched:
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)", self._rows.values())
+            self._conn.executemany(
+                "UPDATE results SET last_used = ? WHERE path = ?",
+                [(now, key) for key, now in self._touched.items()]
+            )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._rows, self._touched = {}, {}
+
+    def lookup(self, path):
+        # Returns (record, None) on a hit, or (None, key) on a miss, where key must be
+        # handed back to store() together with the freshly computed record.
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        now = int(time.time())
+        row = self._conn.execute(
+            "SELECT mtime_ns, size, record FROM results WHERE path = ?", (path,)
+        ).fetchone()
+        if row is not None and row[0] == stat.st_mtime_ns and row[1] == stat.st_size:
+            self._touch(path, now)
+            return json.loads(row[2]), None
+
+        content_hash = _content_hash(path)
+        row = self._conn.execute(
+            "SELECT record FROM results WHERE content_hash = ? LIMIT 1", (content_hash,)
+        ).fetchone()
+        if row is not None:
+            self._write(path, (path, stat.st_mtime_ns, stat.st_size, content_hash, row[0], now))
+            return json.loads(row[0]), None
+
+        return None, (stat.st_mtime_ns, stat.st_size, content_hash)
+
+    def store(self, path, key, record):
+        mtime_ns, size, content_hash = key
+        path = os.path.abspath(path)
+        self._write(path, (path, mtime_ns, size, content_hash, json.dumps(record), int(time.time())))
+
+    def lookup_blob(self, sha):
+        # Git blobs are immutable, so their records are keyed by object id alone.
+        key = f"git:{sha}"
+        row = self._conn.execute("SELECT record FROM results WHERE path = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._touch(key, int(time.time()))
+        return json.loads(row[0])
+
+    def store_blob(self, sha, record):
+        key = f"git:{sha}"
+        self._write(key, (key, 0, 0, key, json.dumps(record), int(time.time())))
+
+    def prune(self, folder_path=None, live_paths=()):
+        # Drops entries for files under folder_path that no longer exist, then
+        # evicts the least recently used entries beyond max_entries. Without a
+        # folder (the git blob entries of --history) only the eviction runs.
+        stale = []
+        if folder_path is not None:
+            prefix = os.path.join(os.path.abspath(folder_path), "")
+            live = {os.path.abspath(path) for path in live_paths}
+            stale = [
+                (path,) for (path,) in self._conn.execute(
+                    "SELECT path FROM results WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+                )
+                if path not in live and not os.path.exists(path)
+            ]
+        self._flush()
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.executemany("DELETE FROM results WHERE path = ?", stale)
+        self._conn.execute(
+            "DELETE FROM results WHERE path IN ("
+            "SELECT path FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        self._conn.execute("COMMIT")
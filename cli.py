@@ -0,0 +1,245 @@
+# Headless entry point for CI pipelines:
+#
+#   python -m cli target_code --jobs 4 --format jsonl --fail-on D
+#
+# Only the analysis modules are imported here (no Streamlit, plotting, pandas or
+# PDF libraries), so the command starts quickly on build agents.
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from contextlib import ExitStack, nullcontext
+from subprocess import CalledProcessError
+
+import profiling
+from aggregate import StreamingAggregator
+from analyzer import FILE_METRIC_KEYS, analyze_folder_records, feed_records, file_metrics, iter_folder_records
+from function_table import RANKS
+from git_diff import DELTA_KEYS, diff_complexity, parse_revisions
+from walker import DEFAULT_IGNORES
+
+EXIT_OK = 0
+EXIT_THRESHOLD = 1
+EXIT_ERROR = 2
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Analyze the Python files in a folder.")
+    parser.add_argument("folder", help="folder to analyze (searched recursively)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="worker processes (default: number of cores)")
+    parser.add_argument("-f", "--format", choices=["jsonl", "json", "csv"], default="jsonl",
+                        help="output format (default: jsonl, one line per file as soon as it is analyzed)")
+    parser.add_argument("-o", "--output", help="write to this file instead of stdout")
+    parser.add_argument("--fail-on", choices=list(RANKS), metavar="RANK",
+                        help="exit with status 1 if any block is ranked RANK or worse (A-F)")
+    parser.add_argument("--ignore", action="append", metavar="GLOB",
+                        help="extra file or directory glob to skip (repeatable)")
+    parser.add_argument("--cache", metavar="PATH",
+                        help="reuse results from a SQLite result cache at PATH")
+    parser.add_argument("--pdf", metavar="PATH", help="also write a PDF report to PATH")
+    parser.add_argument("--chart", metavar="PATH", help="also write the metrics chart (PNG) to PATH")
+    parser.add_argument("--export", metavar="DIR",
+                        help="also write the file and function tables as typed columnar datasets to "
+                             "DIR/files/ and DIR/functions/, streamed as the files are analyzed (needs pyarrow)")
+    parser.add_argument("--export-format", choices=["parquet", "arrow"], default="parquet",
+                        help="format of --export: Parquet or Arrow IPC (default: parquet)")
+    parser.add_argument("--append", action="store_true",
+                        help="add to the --export datasets instead of replacing them")
+    parser.add_argument("--store", metavar="PATH",
+                        help="also record the run in the SQLite metrics store at PATH, which keeps every "
+                             "run of every repository for querying (see store.py)")
+    parser.add_argument("--repo", metavar="NAME",
+                        help="label the --export rows and the --store run with repository NAME, to tell "
+                             "repositories apart (default for --store: the folder's name)")
+    parser.add_argument("--diff", metavar="REVS",
+                        help="only analyze .py files changed in the git repository at FOLDER and report "
+                             "per-function complexity changes; REVS is BASE..HEAD, BASE...HEAD (HEAD against "
+                             "its merge base with BASE, as in a pull request) or a single revision to "
+                             "compare with the working tree")
+    parser.add_argument("--history", type=int, metavar="N",
+                        help="report complexity and function-length aggregates for each of the last N "
+                             "commits of the git repository at FOLDER")
+    parser.add_argument("--summary", action="store_true",
+                        help="print folder-wide aggregates (rank and length histograms, worst "
+                             "functions) as JSON on stderr at the end; computed in constant memory")
+    parser.add_argument("--watch", action="store_true",
+                        help="keep running and emit a JSON line for every file that changes "
+                             "(or {\"file\": ..., \"removed\": true}) until interrupted")
+    parser.add_argument("--trend-chart", metavar="PATH",
+                        help="with --history, also write an interactive trend chart (HTML) to PATH")
+    parser.add_argument("--stats", nargs="?", const="-", metavar="PATH",
+                        help="collect per-stage timings, counters and the slowest files and write them "
+                             "as JSON to PATH (default: stderr)")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="write a cProfile dump of the run to PATH (main process only; use -j 1 "
+                             "to profile the analysis itself)")
+    return parser.parse_args(argv)
+
+def _records(args):
+    ignore = DEFAULT_IGNORES + (args.ignore or [])
+    if args.cache:
+        from cache import ResultCache
+        with ResultCache(args.cache) as cache:
+            yield from analyze_folder_records(args.folder, jobs=args.jobs, cache=cache, ignore=ignore)
+    else:
+        yield from iter_folder_records(args.folder, jobs=args.jobs, ignore=ignore)
+
+def _deltas(args):
+    base, head = parse_revisions(args.diff, args.folder)
+    yield from diff_complexity(args.folder, base, head, jobs=args.jobs)
+
+def _trend(args):
+    from history import complexity_trend
+
+    cache = None
+    if args.cache:
+        from cache import ResultCache
+        cache = ResultCache(args.cache)
+    try:
+        rows = complexity_trend(args.folder, args.history, jobs=args.jobs, cache=cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    if args.trend_chart:
+        from visualize import plot_trend_interactive
+        plot_trend_interactive(rows).write_html(args.trend_chart)
+    return rows
+
+def _watch(args, out):
+    from watch import FolderWatcher
+
+    def emit(changed_records, removed_files):
+        for record in changed_records:
+            out.write(json.dumps(record) + "\n")
+        for file_name in removed_files:
+            out.write(json.dumps({"file": file_name, "removed": True}) + "\n")
+        out.flush()
+
+    ignore = DEFAULT_IGNORES + (args.ignore or [])
+    with FolderWatcher(args.folder, jobs=args.jobs, ignore=ignore, on_update=emit):
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+def _write(items, fmt, out, fieldnames, to_row):
+    if fmt == "jsonl":
+        for item in items:
+            out.write(json.dumps(item) + "\n")
+            out.flush()
+    elif fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=fieldnames, lineterminator="\n")
+        writer.writeheader()
+        for item in items:
+            writer.writerow(to_row(item))
+    else:
+        json.dump(list(items), out, indent=2)
+        out.write("\n")
+
+def _track(records, worst, rows):
+    # Passes records through while remembering the worst rank encountered and,
+    # when rows is a list, collecting the file-level metrics for the reports.
+    for record in records:
+        for block in record["complexity"]:
+            if block["rank"] in RANKS and block["rank"] > worst[0]:
+                worst[0] = block["rank"]
+        if rows is not None:
+            rows.append(file_metrics(record))
+        yield record
+
+def _track_deltas(deltas, worst):
+    # In diff mode only functions the change added or made worse count towards --fail-on.
+    for delta in deltas:
+        if delta["change"] in ("added", "worsened") and delta["new_rank"] > worst[0]:
+            worst[0] = delta["new_rank"]
+        yield delta
+
+def _write_reports(rows, args, summary):
+    # Imported here so plain analysis runs never load fpdf or matplotlib.
+    if args.pdf:
+        from pdf_report import create_pdf_report
+        with profiling.stage("pdf"):
+            create_pdf_report(rows, args.pdf, summary)
+    if args.chart:
+        from visualize import plot_metrics
+        with profiling.stage("chart"):
+            plot_metrics(rows, args.chart)
+
+def _write_stats(stats, path):
+    text = json.dumps(stats.to_dict(), indent=2)
+    if path == "-":
+        print(text, file=sys.stderr)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+def _run(args, out, worst, rows):
+    summary = None
+    if args.watch:
+        _watch(args, out)
+    elif args.history:
+        from history import TREND_KEYS
+        _write(_trend(args), args.format, out, TREND_KEYS, dict)
+    elif args.diff:
+        _write(_track_deltas(_deltas(args), worst), args.format, out, DELTA_KEYS, dict)
+    else:
+        records, sinks = _records(args), []
+        # The PDF report opens with the same aggregates --summary prints.
+        if args.summary or args.pdf:
+            aggregator = StreamingAggregator()
+            sinks.append(aggregator)
+        with ExitStack() as stack:
+            if args.export:
+                from columnar import DatasetWriter
+                sinks.append(stack.enter_context(DatasetWriter(args.export, args.export_format, args.repo, args.append)))
+            if args.store:
+                # The whole run is one transaction, committed once every file is written.
+                from store import MetricsStore
+                store = stack.enter_context(MetricsStore(args.store))
+                repo = args.repo or os.path.basename(os.path.abspath(args.folder))
+                sinks.append(stack.enter_context(store.begin_run(repo, args.folder)))
+            records = feed_records(records, *sinks)
+            _write(_track(records, worst, rows), args.format, out, FILE_METRIC_KEYS, file_metrics)
+        if args.summary or args.pdf:
+            summary = aggregator.summary()
+        if args.summary:
+            print(json.dumps(summary, indent=2), file=sys.stderr)
+    if rows is not None:
+        _write_reports(rows, args, summary)
+
+def main(argv=None):
+    args = _parse_args(argv)
+    if not os.path.isdir(args.folder):
+        print(f"error: '{args.folder}' is not a folder", file=sys.stderr)
+        return EXIT_ERROR
+
+    worst = [""]
+    rows = [] if args.pdf or args.chart else None
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    collecting = args.stats or args.profile
+    try:
+        with profiling.collect(profile_path=args.profile) if collecting else nullcontext() as stats:
+            _run(args, out, worst, rows)
+        if args.stats:
+            _write_stats(stats, args.stats)
+    except CalledProcessError as e:
+        print(f"error: {e.stderr.decode('utf-8', 'replace').strip() or e}", file=sys.stderr)
+        return EXIT_ERROR
+    except (ImportError, OSError, SyntaxError, ValueError, sqlite3.Error) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    finally:
+        if args.output:
+            out.close()
+
+    if args.fail_on and worst[0] >= args.fail_on:
+        print(f"complexity rank {worst[0]} reached the --fail-on threshold {args.fail_on}", file=sys.stderr)
+        return EXIT_THRESHOLD
+    return EXIT_OK
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+import os
+
+from analyzer import file_metrics
+from function_table import KINDS, METRIC_COLUMNS, RANKS, FunctionTable, StringTable
+
+# Parquet and Arrow IPC exports of the file-level and the function-level tables,
+# for pipelines that ingest results from many repositories. Columns are typed
+# (unsigned integers for counts and line numbers, floats for the averages and
+# Halstead metrics, null where a class has none), file paths, kinds and ranks are
+# dictionary-encoded, and records are written one row group (record batch) at a
+# time as they arrive, so no DataFrame of the whole analysis is ever built.
+# pyarrow is optional: it is only imported once an export is written.
+
+ROW_GROUP_SIZE = 64 * 1024
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+# In the order of analyzer.FILE_METRIC_KEYS and function_table.COLUMNS. "path" and
+# "code" columns are dictionary-encoded: paths with int32 indices, the few kinds
+# and ranks with int8 ones.
+FILE_COLUMN_TYPES = {
+    "file": "path", "line_count": "uint32", "sloc": "uint32", "comment_lines": "uint32",
+    "blank_lines": "uint32", "docstring_lines": "uint32", "function_count": "uint32",
+    "avg_function_length": "float64", "max_function_length": "uint32", "longest_function": "string",
+    "halstead_volume": "float64", "halstead_difficulty": "float64", "halstead_effort": "float64",
+    "maintainability_index": "float64",
+}
+FUNCTION_COLUMN_TYPES = {
+    "file": "path", "name": "string", "kind": "code", "start_line": "uint32", "end_line": "uint32",
+    "length": "uint32", "complexity": "uint32", "rank": "code", "nesting_depth": "uint16",
+    **dict.fromkeys(METRIC_COLUMNS, "float64"),
+}
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Parquet and Arrow exports need pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+def _type(pa, spec):
+    if spec == "path":
+        return pa.dictionary(pa.int32(), pa.string())
+    if spec == "code":
+        return pa.dictionary(pa.int8(), pa.string())
+    return getattr(pa, spec)()
+
+def schema(table, repo=False):
+    # The Arrow schema of the "files" or "functions" table; with repo, a
+    # dictionary-encoded repo column comes first.
+    pa = _pyarrow()
+    types = FILE_COLUMN_TYPES if table == "files" else FUNCTION_COLUMN_TYPES
+    fields = [("repo", _type(pa, "path"))] if repo else []
+    fields += [(name, _type(pa, spec)) for name, spec in types.items()]
+    return pa.schema(fields)
+
+class _Dictionary:
+    # The values of a dictionary-encoded path column. Parquet stores a dictionary
+    # per row group, so each batch starts a new one. An Arrow IPC file allows a
+    # single dictionary per column, extended by deltas, so there it keeps growing.
+
+    def __init__(self, cumulative):
+        self.cumulative = cumulative
+        self.strings = StringTable()
+        self._values = None
+
+    def encode(self, pa, codes):
+        if self.cumulative:
+            known = 0 if self._values is None else len(self._values)
+            new = pa.array(self.strings.values[known:], pa.string())
+            self._values = values = new if self._values is None else pa.concat_arrays([self._values, new])
+        else:
+            values = pa.array(self.strings.values, pa.string())
+            self.strings = StringTable()
+        return pa.DictionaryArray.from_arrays(pa.array(codes, pa.int32()), values)
+
+class ColumnarWriter:
+    # Streams the "files" or "functions" table of analysis records to one Parquet or
+    # Arrow IPC file. Records are buffered until about row_group_size rows are
+    # pending, then written as one row group (record batch); memory is bounded by
+    # that, not by the number of records.
+
+    def __init__(self, path, table="files", format="parquet", repo=None, row_group_size=ROW_GROUP_SIZE):
+        if table not in ("files", "functions"):
+            raise ValueError(f"unknown table {table!r} (expected 'files' or 'functions')")
+        if format not in FORMATS:
+            raise ValueError(f"unknown format {format!r} (expected one of {', '.join(FORMATS)})")
+        self.pa = pa = _pyarrow()
+        self.table = table
+        self.repo = repo
+        self.row_group_size = row_group_size
+        self.schema = schema(table, repo is not None)
+        self.rows = 0
+        self._files = _Dictionary(cumulative=format == "arrow")
+        self._pending = [] if table == "files" else FunctionTable(self._files.strings)
+        if format == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(path, self.schema)
+        else:
+            import pyarrow.ipc
+            options = pyarrow.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            self._writer = pyarrow.ipc.new_file(path, self.schema, options=options)
+
+    def add(self, record):
+        if self.table == "files":
+            self._pending.append(file_metrics(record))
+        else:
+            self._pending.add_record(record)
+        if len(self._pending) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not len(self._pending):
+            return
+        columns = self._file_columns() if self.table == "files" else self._function_columns()
+        if self.repo is not None:
+            repo = self.pa.DictionaryArray.from_arrays(
+                self.pa.array([0] * len(self._pending), self.pa.int32()), self.pa.array([self.repo]))
+            columns.insert(0, repo)
+        self._writer.write_batch(self.pa.record_batch(columns, schema=self.schema))
+        self.rows += len(self._pending)
+        self._pending = [] if self.table == "files" else FunctionTable(self._files.strings)
+
+    def _file_columns(self):
+        pa, rows = self.pa, self._pending
+        codes = [self._files.strings.code(row["file"]) for row in rows]
+        columns = [self._files.encode(pa, codes)]
+        for name, spec in list(FILE_COLUMN_TYPES.items())[1:]:
+            columns.append(pa.array([row[name] for row in rows], _type(pa, spec)))
+        return columns
+
+    def _function_columns(self):
+        # Straight from the FunctionTable arrays, without a dict per row.
+        import numpy as np
+
+        pa, table = self.pa, self._pending
+
+        def column(values, dtype):
+            return np.frombuffer(values, dtype=dtype)
+
+        def codes(values, labels):
+            return pa.DictionaryArray.from_arrays(
+                pa.array(column(values, np.uint8).astype(np.int8)), pa.array(list(labels)))
+
+        start, end = column(table.start_lines, np.uint32), column(table.end_lines, np.uint32)
+        names = pa.array(table.names.values, pa.string())
+        columns = [
+            self._files.encode(pa, column(table.file_ids, np.uint32).astype(np.int32)),
+            names.take(pa.array(column(table.name_ids, np.uint32))),
+            codes(table.kinds, KINDS),
+            pa.array(start),
+            pa.array(end),
+            pa.array(end - start + 1),
+            pa.array(column(table.complexities, np.uint32)),
+            codes(table.ranks, RANKS),
+            pa.array(column(table.nesting_depths, np.uint16)),
+        ]
+        # NaN (a class) becomes null.
+        columns += [pa.array(column(table.metrics[name], np.float64), from_pandas=True) for name in METRIC_COLUMNS]
+        return columns
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _read_schema(path, format):
+    if format == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_schema(path)
+    import pyarrow.ipc
+    with pyarrow.ipc.open_file(path) as reader:
+        return reader.schema
+
+def _part_path(directory, format, expected_schema, append):
+    # directory/part-NNNNN.<ext>. Without append the existing parts are replaced,
+    # with it the new part comes after them and must have the same schema.
+    extension = FORMATS[format]
+    os.makedirs(directory, exist_ok=True)
+    parts = sorted(name for name in os.listdir(directory) if name.startswith("part-") and name.endswith(extension))
+    if parts and append:
+        existing = _read_schema(os.path.join(directory, parts[-1]), format)
+        if not existing.equals(expected_schema):
+            raise ValueError(f"cannot append to {directory}: its parts have a different schema "
+                             "(written with a different repo setting or analyzer version?)")
+        return os.path.join(directory, f"part-{int(parts[-1][5:-len(extension)]) + 1:05d}{extension}")
+    for name in parts:
+        os.remove(os.path.join(directory, name))
+    return os.path.join(directory, f"part-00000{extension}")
+
+class DatasetWriter:
+    # Writes both tables in one pass over the records, as the datasets
+    # directory/files/ and directory/functions/ (one part file per export, readable
+    # with pyarrow.dataset or pandas.read_parquet(directory + "/functions")). With
+    # append, each export adds a part, so one dataset can collect many repositories;
+    # pass repo to tell their rows apart.
+
+    def __init__(self, directory, format="parquet", repo=None, append=False, row_group_size=ROW_GROUP_SIZE):
+        if format not in FORMATS:
+            raise ValueError(f"unknown format {format!r} (expected one of {', '.join(FORMATS)})")
+        self.writers = []
+        for table in ("files", "functions"):
+            path = _part_path(os.path.join(directory, table), format, schema(table, repo is not None), append)
+            self.writers.append(ColumnarWriter(path, table, format, repo, row_group_size))
+
+    def add(self, record):
+        for writer in self.writers:
+            writer.add(record)
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def export_dataset(records, directory, format="parquet", repo=None, append=False, row_group_size=ROW_GROUP_SIZE):
+    with DatasetWriter(directory, format, repo, append, row_group_size) as writer:
+        for record in records:
+            writer.add(record)
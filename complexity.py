@@ -1,19 +1,306 @@
-from radon.complexity import cc_visit
-
-def get_radon_complexity(file_path):
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            code = f.read()
-        complexity_data = cc_visit(code)
-        return [
-            {
-                "name": getattr(item, 'name', 'Unknown'),
-                "complexity": getattr(item, 'complexity', 0),
-                "lineno": getattr(item, 'lineno', 0),
-                "rank": getattr(item, 'rank', 'N/A')
-            }
-            for item in complexity_data
-        ]
-    except Exception as e:
-        print(f"Error reading or analyzing {file_path}: {e}")
-        return []
+import ast
+
+from halstead import COUNTED_NODES, HalsteadCounts, count
+
+# Cyclomatic complexity, and function spans with Halstead counts, computed
+# natively, each in one traversal of an already-parsed tree. The complexity
+# results (complexity, rank, names, kinds and block order) are the ones Radon's
+# cc_visit_ast gives; radon_complexity_blocks below keeps Radon as the
+# reference implementation, and benchmarks/radon_parity.py checks the two agree.
+
+_NESTING_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.Try, ast.With, ast.AsyncWith) + tuple(
+    getattr(ast, name) for name in ("Match", "TryStar") if hasattr(ast, name)
+)
+_FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+_SPAN_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+_LOOP_NODES = (ast.For, ast.AsyncFor, ast.While)
+_STATEMENT_NODES = frozenset(ast.stmt.__subclasses__())
+_TRY_NODES = (ast.Try,) + ((ast.TryStar,) if hasattr(ast, "TryStar") else ())
+_Match = getattr(ast, "Match", None)
+# Nodes that can neither add decision points nor contain anything that does.
+_LEAF_NODES = frozenset(
+    [ast.Name, ast.Constant, ast.alias]
+    + [cls for base in (ast.expr_context, ast.operator, ast.unaryop, ast.cmpop, ast.boolop) for cls in base.__subclasses__()]
+)
+
+def cc_rank(complexity):
+    # Same scale as radon.complexity.cc_rank: A 1-5, B 6-10, C 11-20, D 21-30, E 31-40, F 41+.
+    if complexity < 0:
+        raise ValueError(f"Complexity must be a non-negative value, got {complexity}")
+    if complexity <= 5:
+        return "A"
+    if complexity <= 10:
+        return "B"
+    return "CDEF"[min((complexity - 1) // 10 - 1, 3)]
+
+def _decision_points(node, kind):
+    # Radon's counting rules. With statements, lambdas and try* blocks add nothing;
+    # a match adds one per case except a catch-all `case _` / `case name`.
+    if kind is ast.If or kind is ast.IfExp:
+        return 1
+    if kind is ast.BoolOp:
+        return len(node.values) - 1
+    if kind in _LOOP_NODES:
+        return 1 + bool(node.orelse)
+    if kind is ast.comprehension:
+        return 1 + len(node.ifs)
+    if kind is ast.Try:
+        return len(node.handlers) + bool(node.orelse)
+    if kind is _Match:
+        catch_all = any(getattr(case.pattern, "pattern", False) is None for case in node.cases)
+        return max(0, len(node.cases) - catch_all)
+    return 0
+
+def _clause_lines(node, kind):
+    # Logical lines a statement has besides its own: else, except and finally
+    # clauses and match cases. An elif is an If statement of its own.
+    if kind is ast.If:
+        orelse = node.orelse
+        return bool(orelse) and not (type(orelse[0]) is ast.If and orelse[0].col_offset == node.col_offset)
+    if kind in _LOOP_NODES:
+        return bool(node.orelse)
+    if kind in _TRY_NODES:
+        return len(node.handlers) + bool(node.orelse) + bool(node.finalbody)
+    if kind is _Match:
+        return len(node.cases)
+    return 0
+
+def _block(node, complexity, kind, qualname, nesting_depth):
+    return {
+        "name": node.name,
+        "complexity": complexity,
+        "lineno": node.lineno,
+        "rank": cc_rank(complexity),
+        "qualname": qualname,
+        "kind": kind,
+        "endline": node.end_lineno,
+        "nesting_depth": nesting_depth
+    }
+
+class ComplexityVisitor(ast.NodeVisitor):
+    # Visit a module to fill `blocks`, in Radon's order: module-level functions
+    # first, then every class followed by its methods. Like Radon, functions nested
+    # in functions and classes nested in functions or classes are not blocks of
+    # their own and do not count towards their parent; decorators, default values
+    # and base classes are not counted, and an assert counts 1 without its contents.
+
+    def __init__(self):
+        self.functions = []
+        self.classes = []
+        self.total_complexity = 0
+
+    @property
+    def blocks(self):
+        blocks = list(self.functions)
+        for class_block, methods in self.classes:
+            blocks.append(class_block)
+            blocks.extend(methods)
+        return blocks
+
+    def visit_Module(self, node):
+        points, _ = self._scan(node.body, self.functions, self.classes)
+        # Radon's total_complexity, which the maintainability index uses: 1 plus the
+        # decision points of the module, its functions and its classes (unaveraged).
+        self.total_complexity += 1 + points + sum(block["complexity"] - 1 for block in self.functions)
+
+    def _scan(self, statements, functions=None, classes=None, classname=None):
+        # Walks the statements of one scope and returns (decision points, deepest
+        # nesting). Definitions found on the way become blocks when the scope keeps
+        # them (functions/classes lists) and are skipped otherwise.
+        points = 0
+        deepest = 0
+        stack = [(node, 0) for node in reversed(statements)]
+        while stack:
+            node, level = stack.pop()
+            kind = type(node)
+            if kind in _FUNCTION_NODES:
+                if functions is not None:
+                    functions.append(self._function(node, classname))
+                continue
+            if kind is ast.ClassDef:
+                if classes is not None:
+                    classes.append(self._class(node))
+                continue
+            if kind is ast.Assert:
+                points += 1
+                continue
+            points += _decision_points(node, kind)
+            if kind in _NESTING_NODES:
+                level += 1
+                if level > deepest:
+                    deepest = level
+            # Children are pushed in reverse so that definitions are found in source order.
+            # (Inlined rather than a helper: this loop is the hot path of every analysis.)
+            children = []
+            for field in node._fields:
+                value = getattr(node, field, None)
+                if isinstance(value, list):
+                    children.extend(value)
+                elif value is not None:
+                    children.append(value)
+            for child in reversed(children):
+                if isinstance(child, ast.AST) and type(child) not in _LEAF_NODES:
+                    stack.append((child, level))
+        return points, deepest
+
+    def _function(self, node, classname):
+        points, depth = self._scan(node.body)
+        if classname is None:
+            return _block(node, 1 + points, "function", node.name, depth)
+        return _block(node, 1 + points, "method", f"{classname}.{node.name}", depth)
+
+    def _class(self, node):
+        methods = []
+        points, depth = self._scan(node.body, methods, None, node.name)
+        # A class scores its own decision points plus those of its methods, averaged
+        # over the methods (Radon's Class.complexity).
+        total = 1 + points + sum(method["complexity"] for method in methods)
+        self.total_complexity += total - 1
+        if methods:
+            total = int(total / len(methods)) + (len(methods) > 1)
+        return _block(node, total, "class", node.name, depth), methods
+
+def complexity_blocks(tree):
+    visitor = ComplexityVisitor()
+    visitor.visit(tree)
+    return visitor.blocks
+
+def _last_lines(tree):
+    # Last line of every node's subtree, computed bottom-up in a single pass; only
+    # needed for trees whose nodes carry no end_lineno.
+    last = {}
+    stack = [(tree, False)]
+    while stack:
+        node, done = stack.pop()
+        if done:
+            line = getattr(node, "lineno", 0)
+            for child in ast.iter_child_nodes(node):
+                line = max(line, last[child])
+            last[node] = line
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in ast.iter_child_nodes(node))
+    return last
+
+def _function_children(node, counts):
+    # A function's body is counted in its own scope; Radon leaves decorators,
+    # defaults and annotations out of the Halstead counts, so they get none.
+    children = []
+    for field in node._fields:
+        value = getattr(node, field, None)
+        scope = (counts, node.name) if field == "body" else (None, None)
+        for child in value if isinstance(value, list) else (value,):
+            if isinstance(child, ast.AST) and type(child) not in _LEAF_NODES:
+                children.append((child,) + scope)
+    return children
+
+def function_metrics(tree):
+    # One walk over the tree measuring every function, async function and lambda at
+    # any depth, and counting Halstead operators and operands (see halstead.py).
+    # Returns (spans, file counts, {line: counts}): spans are (qualname, lineno, end
+    # line) in walk order, with qualified names built like __qualname__, e.g.
+    # "EventDrivenSimulator.run" or "outer.<locals>.<lambda>". Counts are kept per
+    # function that is not nested in another function, keyed by its def line, and
+    # include the functions nested in it. Linear however deep the nesting, and even
+    # without end_lineno.
+    spans = []
+    last = None
+    module = HalsteadCounts()
+    functions = {}
+    stack = [(tree, "", module, None)]
+    while stack:
+        node, prefix, counts, context = stack.pop()
+        kind = type(node)
+        if kind in _SPAN_NODES:
+            name = prefix + getattr(node, "name", "<lambda>")
+            end = getattr(node, "end_lineno", None)
+            if end is None:
+                last = last if last is not None else _last_lines(tree)
+                end = last[node]
+            spans.append((name, node.lineno, end))
+            prefix = name + ".<locals>."
+            if kind is not ast.Lambda:
+                if context is None:
+                    counts = functions[node.lineno] = HalsteadCounts()
+                counts.statements += 1
+                children = _function_children(node, counts)
+                children.reverse()
+                stack.extend([(child, prefix, scope, function) for child, scope, function in children])
+                continue
+        elif kind is ast.ClassDef:
+            prefix = prefix + node.name + "."
+        if counts is not None:
+            if kind in COUNTED_NODES:
+                count(counts, node, kind, context)
+            elif kind in _STATEMENT_NODES:
+                counts.statements += 1 + _clause_lines(node, kind)
+        # Children in source order, minus leaves (inlined, as in ComplexityVisitor._scan).
+        children = []
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if isinstance(value, list):
+                children.extend(value)
+            elif value is not None:
+                children.append(value)
+        for child in reversed(children):
+            if isinstance(child, ast.AST) and type(child) not in _LEAF_NODES:
+                stack.append((child, prefix, counts, context))
+    total = HalsteadCounts()
+    total.update(module)
+    for counts in functions.values():
+        total.update(counts)
+    return spans, total, functions
+
+def function_spans(tree):
+    # (qualname, lineno, end line) for every function, async function and lambda.
+    return function_metrics(tree)[0]
+
+def radon_complexity_blocks(tree):
+    # Reference implementation on top of Radon, kept to verify complexity_blocks.
+    from radon.complexity import cc_rank as radon_rank, cc_visit_ast
+
+    definitions = {
+        (node.lineno, node.col_offset): node
+        for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+    }
+    blocks = []
+    for item in cc_visit_ast(tree):
+        node = definitions[(item.lineno, item.col_offset)]
+        kind = "class" if hasattr(item, "methods") else "method" if item.is_method else "function"
+        blocks.append({
+            "name": item.name,
+            "complexity": item.complexity,
+            "lineno": item.lineno,
+            "rank": radon_rank(item.complexity),
+            "qualname": item.fullname,
+            "kind": kind,
+            "endline": node.end_lineno,
+            "nesting_depth": _nesting_depth(node)
+        })
+    return blocks
+
+_SCOPE_NODES = _FUNCTION_NODES + (ast.ClassDef, ast.Lambda)
+
+def _nesting_depth(node):
+    # Deepest nesting of control-flow blocks inside node's own body, not descending
+    # into nested functions and classes.
+    depth = 0
+    stack = [(child, 0) for child in ast.iter_child_nodes(node)]
+    while stack:
+        child, level = stack.pop()
+        if isinstance(child, _SCOPE_NODES):
+            continue
+        if isinstance(child, _NESTING_NODES):
+            level += 1
+            depth = max(depth, level)
+        stack.extend((grandchild, level) for grandchild in ast.iter_child_nodes(child))
+    return depth
+
+def __getattr__(name):
+    # Backwards compatibility: get_radon_complexity used to live here. It is resolved
+    # lazily because analyzer imports this module.
+    if name == "get_radon_complexity":
+        from analyzer import get_radon_complexity
+        return get_radon_complexity
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,166 @@
+import math
+from array import array
+
+RANKS = "ABCDEF"
+KINDS = ["function", "method", "class"]
+
+# Halstead metrics and the maintainability index; NaN for classes, which have none.
+METRIC_COLUMNS = ["halstead_volume", "halstead_difficulty", "halstead_effort", "maintainability_index"]
+
+COLUMNS = ["file", "name", "kind", "start_line", "end_line", "length", "complexity", "rank", "nesting_depth"] + METRIC_COLUMNS
+
+class StringTable:
+    # Interns strings: every distinct value is stored once and rows refer to it by code.
+
+    def __init__(self, values=()):
+        self.values = []
+        self._codes = {}
+        for value in values:
+            self.code(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __getstate__(self):
+        return self.values
+
+    def __setstate__(self, values):
+        self.__init__(values)
+
+class FunctionTable:
+    # Function-level metrics stored column-wise in typed arrays, one entry per
+    # block reported by the analyzer. File and function names are interned, so a
+    # row costs a few dozen bytes instead of a dict per function.
+
+    def __init__(self, files=None):
+        # files may be a StringTable shared with other tables, so file codes agree between them.
+        self.files = StringTable() if files is None else files
+        self.names = StringTable()
+        self.file_ids = array("I")
+        self.name_ids = array("I")
+        self.kinds = array("B")
+        self.start_lines = array("I")
+        self.end_lines = array("I")
+        self.complexities = array("I")
+        self.ranks = array("B")
+        self.nesting_depths = array("H")
+        self.metrics = {column: array("d") for column in METRIC_COLUMNS}
+
+    def __len__(self):
+        return len(self.file_ids)
+
+    @classmethod
+    def from_records(cls, records):
+        table = cls()
+        for record in records:
+            table.add_record(record)
+        return table
+
+    def add_record(self, record):
+        file_id = self.files.code(record["file"])
+        for block in record["complexity"]:
+            self.file_ids.append(file_id)
+            self.name_ids.append(self.names.code(block["qualname"]))
+            self.kinds.append(KINDS.index(block["kind"]))
+            self.start_lines.append(block["lineno"])
+            self.end_lines.append(block["endline"])
+            self.complexities.append(block["complexity"])
+            self.ranks.append(RANKS.index(block["rank"]))
+            self.nesting_depths.append(block["nesting_depth"])
+            for column, values in self.metrics.items():
+                values.append(block.get(column, math.nan))
+
+    def row(self, index):
+        start, end = self.start_lines[index], self.end_lines[index]
+        row = {
+            "file": self.files.values[self.file_ids[index]],
+            "name": self.names.values[self.name_ids[index]],
+            "kind": KINDS[self.kinds[index]],
+            "start_line": start,
+            "end_line": end,
+            "length": end - start + 1,
+            "complexity": self.complexities[index],
+            "rank": RANKS[self.ranks[index]],
+            "nesting_depth": self.nesting_depths[index],
+        }
+        row.update((column, values[index]) for column, values in self.metrics.items())
+        return row
+
+    def to_pandas(self):
+        # Builds the DataFrame straight from the arrays (one buffer copy per column,
+        # no per-row objects); string columns become categoricals over the interned values.
+        import numpy as np
+        import pandas as pd
+
+        def column(values, dtype):
+            # Copied so the table can keep growing while the DataFrame is alive.
+            return np.frombuffer(values, dtype=dtype).copy()
+
+        start = column(self.start_lines, np.uint32)
+        end = column(self.end_lines, np.uint32)
+        columns = {
+            "file": pd.Categorical.from_codes(column(self.file_ids, np.uint32), self.files.values),
+            "name": pd.Categorical.from_codes(column(self.name_ids, np.uint32), self.names.values),
+            "kind": pd.Categorical.from_codes(column(self.kinds, np.uint8), KINDS),
+            "start_line": start,
+            "end_line": end,
+            "length": end - start + 1,
+            "complexity": column(self.complexities, np.uint32),
+            "rank": pd.Categorical.from_codes(column(self.ranks, np.uint8), list(RANKS), ordered=True),
+            "nesting_depth": column(self.nesting_depths, np.uint16),
+        }
+        columns.update((name, column(values, np.float64)) for name, values in self.metrics.items())
+        return pd.DataFrame(columns, columns=COLUMNS)
+
+    def _sort_keys(self, column):
+        # One numeric key per row for column: the value itself, or for the string
+        # columns the position of the value in sorted order.
+        import numpy as np
+
+        if column in ("file", "name"):
+            strings, codes = (self.files, self.file_ids) if column == "file" else (self.names, self.name_ids)
+            positions = np.empty(len(strings), dtype=np.uint32)
+            positions[np.argsort(np.array(strings.values, dtype=object))] = np.arange(len(strings), dtype=np.uint32)
+            return positions[np.frombuffer(codes, dtype=np.uint32)]
+        if column == "length":
+            return self._sort_keys("end_line").astype(np.int64) - self._sort_keys("start_line")
+        arrays = {
+            "kind": self.kinds, "start_line": self.start_lines, "end_line": self.end_lines,
+            "complexity": self.complexities, "rank": self.ranks, "nesting_depth": self.nesting_depths,
+        }
+        values = self.metrics.get(column) or arrays[column]
+        return np.frombuffer(values, dtype=np.dtype(values.typecode))
+
+    def select(self, ranks=None, file_contains=None, min_complexity=None, sort_by=None, descending=False):
+        # Row indices (a numpy array) of the rows with one of `ranks`, a file path
+        # containing `file_contains` and at least `min_complexity`, sorted by the
+        # `sort_by` column or else in table order. Filtering and sorting run on the
+        # arrays, so only the rows that are eventually shown become dicts (see rows).
+        import numpy as np
+
+        mask = np.ones(len(self), dtype=bool)
+        if ranks is not None:
+            mask &= np.isin(np.frombuffer(self.ranks, dtype=np.uint8), [RANKS.index(rank) for rank in ranks])
+        if file_contains:
+            # Matched against the distinct paths only, then mapped to rows by id.
+            matching = [code for code, path in enumerate(self.files.values) if file_contains in path]
+            mask &= np.isin(np.frombuffer(self.file_ids, dtype=np.uint32), matching)
+        if min_complexity:
+            mask &= np.frombuffer(self.complexities, dtype=np.uint32) >= min_complexity
+        indices = np.flatnonzero(mask)
+        if sort_by is not None:
+            # As floats, so that descending order is a negation that keeps ties in
+            # table order and leaves rows without a value (NaN) last.
+            keys = self._sort_keys(sort_by)[indices].astype(np.float64)
+            indices = indices[np.argsort(-keys if descending else keys, kind="stable")]
+        return indices
+
+    def rows(self, indices):
+        return [self.row(int(index)) for index in indices]
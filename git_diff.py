@@ -0,0 +1,157 @@
+import os
+import subprocess
+from collections import Counter
+
+from analyzer import analyze_source, map_files
+
+DELTA_KEYS = ["file", "name", "change", "old_complexity", "new_complexity", "delta", "old_rank", "new_rank"]
+
+def parse_revisions(spec, repo="."):
+    # "base..head" compares two commits; "base...head" compares head with the
+    # merge base of the two (what a pull request changes), resolved in repo; a
+    # single revision compares it with the working tree.
+    if "..." in spec:
+        base, head = spec.split("...", 1)
+        base, head = base or "HEAD", head or "HEAD"
+        return run_git(repo, "merge-base", base, head).decode("utf-8").strip(), head
+    if ".." in spec:
+        base, head = spec.split("..", 1)
+        return base or "HEAD", head or "HEAD"
+    return spec, None
+
+def run_git(repo, *args):
+    return subprocess.run(
+        ["git", *args], cwd=repo, check=True, capture_output=True
+    ).stdout
+
+class BlobReader:
+    # Reads blobs straight from the object store through one long-lived
+    # `git cat-file --batch` process instead of one git call per file.
+
+    def __init__(self, repo):
+        self._proc = subprocess.Popen(
+            ["git", "cat-file", "--batch"], cwd=repo,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._proc.stdin.close()
+        self._proc.stdout.close()
+        self._proc.wait()
+
+    def read(self, spec):
+        # spec is anything git accepts as an object name, e.g. "HEAD:./pkg/mod.py" or a blob SHA.
+        self._proc.stdin.write(spec.encode("utf-8") + b"\n")
+        self._proc.stdin.flush()
+        header = self._proc.stdout.readline()
+        if not header or header.endswith(b" missing\n"):
+            return None
+        size = int(header.split()[2])
+        data = self._proc.stdout.read(size)
+        self._proc.stdout.read(1)  # trailing newline after the object
+        return data
+
+def changed_python_files(repo, base, head=None):
+    # Returns [(status, old path, new path)] for .py files changed under repo, with
+    # paths relative to repo and status A (added), D (deleted), M (modified) or R
+    # (renamed, possibly modified too); the paths differ only for renames. Renames
+    # are followed, so a moved file is compared with itself, not reported as all new.
+    revisions = [base, head] if head else [base]
+    output = run_git(repo, "diff", "--name-status", "--find-renames", "--relative", "-z", *revisions, "--", "*.py")
+    fields = output.decode("utf-8").split("\0")
+    changes, index = [], 0
+    while index < len(fields) - 1:
+        status = fields[index][0]
+        if status in "RC":
+            old_path, new_path = fields[index + 1], fields[index + 2]
+            index += 3
+        else:
+            old_path = new_path = fields[index + 1]
+            index += 2
+        changes.append((status, old_path, new_path))
+    return changes
+
+def analyze_blob(named_source):
+    name, source = named_source
+    if source is None:
+        return None
+    try:
+        return analyze_source(source.decode("utf-8"), name)
+    except (SyntaxError, ValueError, UnicodeDecodeError):
+        return None
+
+def blob_size(named_source):
+    return len(named_source[1] or b"")
+
+def _blocks_by_name(record):
+    # Keyed by (qualname, occurrence) so e.g. a property getter and setter stay distinct.
+    blocks, seen = {}, Counter()
+    for block in record["complexity"] if record else []:
+        key = (block["qualname"], seen[block["qualname"]])
+        seen[block["qualname"]] += 1
+        blocks[key] = block
+    return blocks
+
+def complexity_deltas(file_name, old_record, new_record):
+    old_blocks, new_blocks = _blocks_by_name(old_record), _blocks_by_name(new_record)
+    deltas = []
+    for key in list(new_blocks) + [key for key in old_blocks if key not in new_blocks]:
+        old, new = old_blocks.get(key), new_blocks.get(key)
+        old_complexity = old["complexity"] if old else None
+        new_complexity = new["complexity"] if new else None
+        if old is None:
+            change = "added"
+        elif new is None:
+            change = "removed"
+        elif new_complexity > old_complexity:
+            change = "worsened"
+        elif new_complexity < old_complexity:
+            change = "improved"
+        else:
+            continue
+        deltas.append({
+            "file": file_name,
+            "name": key[0],
+            "change": change,
+            "old_complexity": old_complexity,
+            "new_complexity": new_complexity,
+            "delta": (new_complexity or 0) - (old_complexity or 0),
+            "old_rank": old["rank"] if old else None,
+            "new_rank": new["rank"] if new else None,
+        })
+    return deltas
+
+def _read_worktree(repo, path):
+    try:
+        with open(os.path.join(repo, path), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def diff_complexity(repo=".", base="HEAD", head=None, jobs=1):
+    # Analyzes only the .py files that differ between base and head (or the working
+    # tree when head is None) and reports per-function complexity changes.
+    changes = changed_python_files(repo, base, head)
+    sources = []
+    with BlobReader(repo) as blobs:
+        for status, old_path, new_path in changes:
+            old = None if status == "A" else blobs.read(f"{base}:./{old_path}")
+            if status == "D":
+                new = None
+            elif head:
+                new = blobs.read(f"{head}:./{new_path}")
+            else:
+                new = _read_worktree(repo, new_path)
+            sources.extend([(old_path, old), (new_path, new)])
+
+    records = list(map_files(analyze_blob, sources, jobs, size_of=blob_size))
+    deltas = []
+    for index, (_, _, path) in enumerate(changes):
+        deltas.extend(complexity_deltas(path, records[2 * index], records[2 * index + 1]))
+    return deltas
@@ -0,0 +1,117 @@
+import ast
+import math
+
+# Halstead metrics and the maintainability index. Operators and operands are
+# counted the way Radon's HalsteadVisitor counts them: binary, unary, boolean,
+# augmented-assignment and comparison operators, with their direct operands.
+# Names, attributes and constants are told apart by identifier or value (per
+# enclosing function, as Radon does); any other operand expression is distinct.
+# The counting happens inside complexity.function_metrics, during the walk
+# that also measures function spans; radon_halstead below keeps Radon as the
+# reference implementation, and benchmarks/halstead_parity.py checks the two agree.
+
+HALSTEAD_KEYS = ["halstead_volume", "halstead_difficulty", "halstead_effort"]
+METRIC_KEYS = HALSTEAD_KEYS + ["maintainability_index"]
+
+_OPERAND_KEYS = {ast.Name: "id", ast.Attribute: "attr", ast.Constant: "value"}
+
+class HalsteadCounts:
+    # Operator/operand totals and distinct sets for one scope, plus the number of
+    # statements in it (the logical lines the maintainability index needs).
+    __slots__ = ("operators", "operands", "operators_seen", "operands_seen", "statements")
+
+    def __init__(self):
+        self.operators = 0
+        self.operands = 0
+        self.operators_seen = set()
+        self.operands_seen = set()
+        self.statements = 0
+
+    def update(self, other):
+        self.operators += other.operators
+        self.operands += other.operands
+        self.operators_seen |= other.operators_seen
+        self.operands_seen |= other.operands_seen
+        self.statements += other.statements
+
+def _add_operands(counts, context, operands):
+    seen = counts.operands_seen
+    for operand in operands:
+        key = _OPERAND_KEYS.get(type(operand))
+        seen.add((context, operand if key is None else getattr(operand, key)))
+
+def count(counts, node, kind, context):
+    # Adds node's operators and operands to counts when node is one of the counted
+    # expressions. context is the name of the enclosing function (None at module level).
+    if kind is ast.BinOp:
+        counts.operators += 1
+        counts.operands += 2
+        counts.operators_seen.add(type(node.op).__name__)
+        _add_operands(counts, context, (node.left, node.right))
+    elif kind is ast.Compare:
+        counts.operators += len(node.ops)
+        counts.operands += len(node.comparators) + 1
+        counts.operators_seen.update(type(op).__name__ for op in node.ops)
+        _add_operands(counts, context, node.comparators)
+        _add_operands(counts, context, (node.left,))
+    elif kind is ast.BoolOp:
+        counts.operators += 1
+        counts.operands += len(node.values)
+        counts.operators_seen.add(type(node.op).__name__)
+        _add_operands(counts, context, node.values)
+    elif kind is ast.UnaryOp:
+        counts.operators += 1
+        counts.operands += 1
+        counts.operators_seen.add(type(node.op).__name__)
+        _add_operands(counts, context, (node.operand,))
+    elif kind is ast.AugAssign:
+        counts.operators += 1
+        counts.operands += 2
+        counts.operators_seen.add(type(node.op).__name__)
+        _add_operands(counts, context, (node.target, node.value))
+
+COUNTED_NODES = frozenset([ast.BinOp, ast.Compare, ast.BoolOp, ast.UnaryOp, ast.AugAssign])
+
+def halstead_report(counts):
+    # Volume V = N log2(n), difficulty D = n1/2 * N2/n2 and effort E = D V, where n1
+    # and n2 are the distinct operators and operands, N = N1 + N2 their totals.
+    distinct_operators, distinct_operands = len(counts.operators_seen), len(counts.operands_seen)
+    vocabulary = distinct_operators + distinct_operands
+    volume = (counts.operators + counts.operands) * math.log(vocabulary, 2) if vocabulary else 0
+    difficulty = distinct_operators * counts.operands / (2 * distinct_operands) if distinct_operands else 0
+    return {
+        "halstead_volume": volume,
+        "halstead_difficulty": difficulty,
+        "halstead_effort": difficulty * volume,
+    }
+
+def maintainability_index(volume, complexity, logical_lines, comment_percent):
+    # Radon's variant of the index, scaled to 0-100 (mi_compute): higher is better.
+    if volume <= 0 or logical_lines <= 0:
+        return 100.0
+    raw = (171 - 5.2 * math.log(volume) - 0.23 * complexity - 16.2 * math.log(logical_lines)
+           + 50 * math.sin(math.sqrt(2.46 * math.radians(comment_percent))))
+    return min(max(0.0, raw * 100 / 171.0), 100.0)
+
+def comment_percent(comment_lines, sloc):
+    # Comment and docstring lines relative to source lines, as mi_visit(multi=True) does.
+    return comment_lines / sloc * 100 if sloc else 0
+
+def rounded(metrics, digits=2):
+    return {key: round(value, digits) for key, value in metrics.items()}
+
+def radon_halstead(tree):
+    # Reference implementation on top of Radon, kept to verify the native counts:
+    # the file report and (function name, report) pairs for the functions Radon
+    # reports, i.e. those not nested in another function.
+    from radon.metrics import h_visit_ast
+
+    def report(radon_report):
+        return {
+            "halstead_volume": radon_report.volume,
+            "halstead_difficulty": radon_report.difficulty,
+            "halstead_effort": radon_report.effort,
+        }
+
+    result = h_visit_ast(tree)
+    return report(result.total), [(name, report(function)) for name, function in result.functions]
@@ -0,0 +1,91 @@
+from analyzer import map_files
+from function_table import RANKS
+from git_diff import BlobReader, analyze_blob, blob_size, run_git
+
+TREND_KEYS = [
+    "commit", "timestamp", "subject", "files", "line_count", "function_count",
+    "avg_function_length", "max_function_length", "avg_complexity", "max_complexity",
+] + [f"rank_{rank}" for rank in RANKS]
+
+def recent_commits(repo, count, revision="HEAD"):
+    # Returns [(sha, unix timestamp, subject)] for the last `count` commits, oldest first.
+    output = run_git(repo, "log", f"--max-count={count}", "--format=%H%x00%ct%x00%s", revision, "--")
+    commits = []
+    for line in output.decode("utf-8", "replace").splitlines():
+        sha, timestamp, subject = line.split("\0", 2)
+        commits.append((sha, int(timestamp), subject))
+    commits.reverse()
+    return commits
+
+def python_blobs(repo, commit):
+    # Returns {path: blob sha} for the .py files of commit below repo.
+    output = run_git(repo, "ls-tree", "-r", "-z", commit)
+    blobs = {}
+    for entry in output.decode("utf-8").split("\0"):
+        if not entry:
+            continue
+        meta, path = entry.split("\t", 1)
+        _, kind, sha = meta.split()
+        if kind == "blob" and path.endswith(".py"):
+            blobs[path] = sha
+    return blobs
+
+def _analyze_blobs(repo, shas, jobs, cache):
+    # Each distinct blob is analyzed once, whatever number of commits share it.
+    results, missing = {}, []
+    for sha in shas:
+        record = cache.lookup_blob(sha) if cache is not None else None
+        if record is None:
+            missing.append(sha)
+        else:
+            results[sha] = record
+    with BlobReader(repo) as blobs:
+        sources = ((sha, blobs.read(sha)) for sha in missing)
+        for sha, record in zip(missing, map_files(analyze_blob, sources, jobs, size_of=blob_size)):
+            results[sha] = record
+            if cache is not None and record is not None:
+                cache.store_blob(sha, record)
+    if cache is not None:
+        # Blob entries belong to no folder, so only the size cap applies to them.
+        cache.prune()
+    return results
+
+def commit_aggregates(commit, records):
+    sha, timestamp, subject = commit
+    records = [record for record in records if record is not None]
+    function_count = sum(record["function_count"] for record in records)
+    complexities = [
+        block["complexity"] for record in records for block in record["complexity"] if block["kind"] != "class"
+    ]
+    row = {
+        "commit": sha,
+        "timestamp": timestamp,
+        "subject": subject,
+        "files": len(records),
+        "line_count": sum(record["line_count"] for record in records),
+        "function_count": function_count,
+        "avg_function_length": round(
+            sum(record["avg_function_length"] * record["function_count"] for record in records) / function_count, 2
+        ) if function_count else 0,
+        "max_function_length": max((record["max_function_length"] for record in records), default=0),
+        "avg_complexity": round(sum(complexities) / len(complexities), 2) if complexities else 0,
+        "max_complexity": max(complexities, default=0),
+    }
+    for rank in RANKS:
+        row[f"rank_{rank}"] = 0
+    for record in records:
+        for block in record["complexity"]:
+            if block["kind"] != "class":
+                row[f"rank_{block['rank']}"] += 1
+    return row
+
+def complexity_trend(repo=".", count=50, revision="HEAD", jobs=1, cache=None):
+    # Per-commit aggregates for the last `count` commits, oldest first.
+    commits = recent_commits(repo, count, revision)
+    trees = [python_blobs(repo, sha) for sha, _, _ in commits]
+    unique = sorted({sha for tree in trees for sha in tree.values()})
+    results = _analyze_blobs(repo, unique, jobs, cache)
+    return [
+        commit_aggregates(commit, [results[sha] for sha in tree.values()])
+        for commit, tree in zip(commits, trees)
+    ]
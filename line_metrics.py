@@ -0,0 +1,149 @@
+import ast
+import io
+import re
+import tokenize
+
+# Classifies every physical line of a module as code, comment, blank or docstring,
+# from the source text the analyzer already holds. A line with code and a trailing
+# comment is code; lines of a multi-line string belong to the statement using it,
+# so they are docstring lines for docstrings and code otherwise.
+#
+# Python's tokenize module would roughly double the cost of analyzing a file, so
+# line_counts makes one regular-expression scan that only picks out comments and
+# string literals (the patterns are tokenize's own). tokenize_line_counts is the
+# reference implementation on top of tokenize and ast; benchmarks/line_counts.py
+# checks that the two agree.
+
+LINE_METRIC_KEYS = ["sloc", "comment_lines", "blank_lines", "docstring_lines"]
+
+_BLANK, _COMMENT, _CODE, _DOCSTRING = range(4)
+
+_TOKENS = re.compile(r'''
+    (?P<comment>\#[^\n]*)
+  | """[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*"""
+  | \'\'\'[^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*\'\'\'
+  | "[^\n"\\]*(?:\\.[^\n"\\]*)*"
+  | \'[^\n'\\]*(?:\\.[^\n'\\]*)*\'
+''', re.VERBOSE | re.DOTALL)
+
+def _split_lines(content):
+    if "\r" in content:
+        content = content.replace("\r\n", "\n").replace("\r", "\n")
+    lines = content.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    return content, lines
+
+def _counts(kinds):
+    return {
+        "sloc": kinds.count(_CODE),
+        "comment_lines": kinds.count(_COMMENT),
+        "blank_lines": kinds.count(_BLANK),
+        "docstring_lines": kinds.count(_DOCSTRING),
+    }
+
+_HEADER = re.compile(r"\s*(?:async\s+def|def|class)\b")
+# String prefixes (r, u, b, f and combinations) sit right before the quote. Bytes
+# and f-strings are never docstrings.
+_PREFIX = re.compile(r"(?<!\w)[rRbBuUfF]{1,2}$")
+_NOT_DOCSTRING = re.compile(r"[rRuU]?[bBfF]")
+
+def _opens_body(lines, kinds, comments, line, indent):
+    # True when the string statement starting on `line` (at column `indent`) is the
+    # first statement of the module, or of a function or class body.
+    previous = line - 1
+    while previous >= 0 and kinds[previous] in (_BLANK, _COMMENT):
+        previous -= 1
+    if previous < 0:
+        return True
+    text = lines[previous]
+    if previous in comments:
+        text = text[:comments[previous]]
+    if not text.rstrip().endswith(":"):
+        return False
+    # The header may span several lines: its first line is the closest code line
+    # above that is indented less than the body and does not close a bracket.
+    while previous >= 0:
+        text = lines[previous]
+        stripped = text.lstrip()
+        if kinds[previous] == _CODE and len(text) - len(stripped) < indent and stripped[0] not in ")]}":
+            return _HEADER.match(text) is not None
+        previous -= 1
+    return False
+
+def line_kinds(content):
+    # The kind of every physical line; count_kinds turns them into LINE_METRIC_KEYS.
+    content, lines = _split_lines(content)
+    kinds = [
+        _BLANK if not stripped else _COMMENT if stripped[0] == "#" else _CODE
+        for stripped in map(str.lstrip, lines)
+    ]
+
+    comments = {}
+    line, position = 0, 0
+    for match in _TOKENS.finditer(content):
+        start, end = match.span()
+        line += content.count("\n", position, start)
+        position = start
+        line_start = content.rfind("\n", 0, start) + 1
+        if match.lastgroup == "comment":
+            comments[line] = start - line_start
+            continue
+        end_line = line + content.count("\n", start, end)
+        line_end = content.find("\n", end)
+        rest = content[end:line_end if line_end >= 0 else len(content)].strip()
+        before = content[line_start:start]
+        prefix = _PREFIX.search(before)
+        if prefix is not None:
+            before = before[:prefix.start()]
+        first = line + 1
+        kind = _CODE
+        # Only plain str literals standing alone as a statement can be docstrings;
+        # like the AST, `"""doc"""; x = 1` keeps the whole line as docstring.
+        if (not rest or rest[0] in "#;") and not (prefix and _NOT_DOCSTRING.match(prefix.group())):
+            if not before.strip():
+                if _opens_body(lines, kinds, comments, line, len(before)):
+                    first, kind = line, _DOCSTRING
+            elif before.rstrip().endswith(":") and _HEADER.match(before):
+                # def f(): """... : the header line itself stays code.
+                kind = _DOCSTRING
+        for index in range(first, end_line + 1):
+            kinds[index] = kind
+        line, position = end_line, end
+    return kinds
+
+def count_kinds(kinds, first=1, last=None):
+    # Counts for lines first..last (1-based, inclusive), by default the whole module.
+    return _counts(kinds if first == 1 and last is None else kinds[first - 1:last])
+
+def line_counts(content):
+    return _counts(line_kinds(content))
+
+def _docstring_lines(tree, lines):
+    # Docstrings as defined by the AST; the first line is left alone when it also
+    # holds other code, as in `def f(): "doc"`.
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)) and node.body:
+            first = node.body[0]
+            if isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant) and isinstance(first.value.value, str):
+                start = first.lineno - 1
+                if lines[start][:first.col_offset].strip():
+                    start += 1
+                yield from range(start, first.end_lineno)
+
+def tokenize_line_counts(content):
+    # Reference implementation: tokenize for code/comment/blank, the AST for docstrings.
+    content, lines = _split_lines(content)
+    kinds = [_BLANK] * len(lines)
+    ignored = (tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER)
+    for token in tokenize.generate_tokens(io.StringIO(content).readline):
+        if token.type == tokenize.COMMENT:
+            row = token.start[0] - 1
+            if kinds[row] == _BLANK:
+                kinds[row] = _COMMENT
+        elif token.type not in ignored:
+            for row in range(token.start[0] - 1, min(token.end[0], len(lines))):
+                kinds[row] = _CODE
+    for row in _docstring_lines(ast.parse(content), lines):
+        kinds[row] = _DOCSTRING
+    return _counts(kinds)
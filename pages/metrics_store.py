@@ -0,0 +1,67 @@
+import os
+import time
+
+import streamlit as st
+
+from analyzer import analyze_folder_records
+from cache import ResultCache
+from function_table import RANKS
+from store import DEFAULT_STORE_PATH, ORDER_COLUMNS, MetricsStore
+
+# Queries the SQLite metrics store across every recorded repository and run. Each
+# rerun opens its own connection (SQLite connections are per thread) and runs one
+# indexed query with a limit, so the page stays fast however large the store is.
+
+st.set_page_config(layout="wide")
+st.title("🗄️ Metrics Store")
+
+store_path = st.text_input("Store path:", DEFAULT_STORE_PATH, help="SQLite file written by this page or by `python -m cli FOLDER --store PATH`")
+
+with st.expander("➕ Record a run"):
+    folder = st.text_input("Folder to analyze:", "target_code", key="store_folder")
+    repo = st.text_input("Repository name:", os.path.basename(os.path.abspath(folder)), key="store_repo")
+    if st.button("Analyze and store"):
+        if not os.path.isdir(folder):
+            st.error(f"The folder '{folder}' does not exist or is not valid. Please enter a correct path.")
+        else:
+            with st.spinner("Analyzing folder..."):
+                with ResultCache() as cache:
+                    records = analyze_folder_records(folder, jobs=os.cpu_count() or 1, cache=cache)
+                with MetricsStore(store_path) as store:
+                    run_id = store.add_run(records, repo, folder)
+            st.success(f"Stored run {run_id} of '{repo}' ({len(records)} files).")
+
+if not os.path.exists(store_path):
+    st.info(f"No metrics store at '{store_path}' yet. Record a run above or with the CLI.")
+    st.stop()
+
+with MetricsStore(store_path) as store:
+    repos = store.repos()
+    latest = st.toggle("Latest run of each repository only", value=True)
+
+    st.subheader("Runs")
+    st.dataframe(store.runs(latest=latest), hide_index=True)
+
+    st.subheader("Functions")
+    repo_column, ranks_column, complexity_column = st.columns(3)
+    repo = repo_column.selectbox("Repository", ["All"] + repos)
+    ranks = ranks_column.multiselect("Rank", list(RANKS), default=["D", "E", "F"])
+    min_complexity = complexity_column.number_input("Minimum complexity", min_value=0, value=0, step=1)
+    path_column, order_column, direction_column, limit_column = st.columns(4)
+    path_prefix = path_column.text_input("Path starts with")
+    order_by = order_column.selectbox("Order by", ORDER_COLUMNS)
+    descending = direction_column.toggle("Descending", value=order_by == "complexity")
+    limit = limit_column.selectbox("Rows", [100, 500, 1000])
+
+    filters = {
+        "ranks": ranks or None, "min_complexity": min_complexity, "path_prefix": path_prefix,
+        "repo": None if repo == "All" else repo, "latest": latest,
+        "order_by": order_by, "descending": descending, "limit": limit,
+    }
+    start = time.perf_counter()
+    rows = store.functions(**filters)
+    elapsed = time.perf_counter() - start
+    st.dataframe(rows, hide_index=True)
+    st.caption(f"{len(rows)} rows in {elapsed * 1000:.1f} ms")
+    with st.expander("Query plan"):
+        st.code("\n".join(store.query_plan(**filters)))
@@ -1,45 +1,207 @@
-from fpdf import FPDF
+import heapq
 import os
+from functools import lru_cache
+from io import BytesIO
 
-class PDF(FPDF):
-    def header(self):
-        self.set_font("Helvetica", 'B', 15)
-        self.cell(0, 10, "Code Quality Analysis Report", ln=True, align="C")
-        self.ln(10)
-
-    def chapter_title(self, title):
-        self.set_font('Helvetica', 'B', 12)
-        self.cell(0, 10, title, ln=True, align="L")
-        self.ln(5)
-
-    def chapter_body(self, body):
-        self.set_font('Helvetica', '', 10)
-        self.multi_cell(0, 6, body)
-        self.ln()
-
-    def add_table(self, data, headers):
-        self.set_font('Helvetica', 'B', 9)
-        col_width = 190 / len(headers)
-        for header in headers:
-            self.cell(col_width, 7, header, 1, 0, 'C')
-        self.ln()
-
-        self.set_font('Helvetica', '', 8)
-        for row in data:
-            for header in headers:
-                cell_value = str(row.get(header, ''))
-                self.cell(col_width, 6, cell_value, 1, 0, 'L')
+# fpdf is only imported once a report is actually generated. The PDF class is
+# built on first use and still importable as pdf_report.PDF (see __getattr__).
+
+ROW_HEIGHT = 6
+HEADER_HEIGHT = 7
+
+@lru_cache(maxsize=None)
+def _pdf_class():
+    from fpdf import FPDF
+
+    class PDF(FPDF):
+        def header(self):
+            self.set_font("Helvetica", 'B', 15)
+            self.cell(0, 10, "Code Quality Analysis Report", ln=True, align="C")
+            self.ln(10)
+
+        def chapter_title(self, title):
+            self.set_font('Helvetica', 'B', 12)
+            self.cell(0, 10, title, ln=True, align="L")
+            self.ln(5)
+
+        def chapter_body(self, body):
+            self.set_font('Helvetica', '', 10)
+            self.multi_cell(0, 6, body)
             self.ln()
-        self.ln(5)
 
-def create_pdf_report(analysis_results, output_path="output/code_analysis_report.pdf"):
-    os.makedirs("output", exist_ok=True)
-    pdf = PDF()
+        def chart(self, png, width):
+            # A chart rendered in memory (PNG bytes), on a new page if it does not fit.
+            self.image(BytesIO(png), w=width)
+            self.ln(5)
+
+        def _table_header(self, headers, widths, labels):
+            self.set_font('Helvetica', 'B', 7)
+            for header, width in zip(headers, widths):
+                self.cell(width, HEADER_HEIGHT, labels.get(header, header), 1, 0, 'C')
+            self.ln()
+            self.set_font('Helvetica', '', 8)
+            return self.y
+
+        def _table_grid(self, widths, top):
+            # Vertical rules of the rows written on the current page since `top`.
+            x = self.l_margin
+            for width in widths:
+                self.line(x, top, x, self.y)
+                x += width
+            self.line(x, top, x, self.y)
+
+        def add_table(self, data, headers, labels=None, widths=None):
+            # Rows are streamed one page at a time: each value is placed with text(),
+            # a tenth of the cost of a bordered cell(), with one rule under every row
+            # and the column rules drawn once per page. Page breaks are handled here,
+            # repeating the header, so `data` can be any iterable of dicts.
+            if widths is None:
+                # The first column (the file path) gets twice the width of the others.
+                col_width = (self.w - self.l_margin - self.r_margin) / (len(headers) + 1)
+                widths = [col_width * 2] + [col_width] * (len(headers) - 1)
+            labels = labels or {}
+            # Values are clipped to their column by an average character width
+            # instead of measuring every string; paths keep their end.
+            max_chars = [max(1, int((width - 2) / 1.6)) for width in widths]
+            right = self.l_margin + sum(widths)
+
+            if self.y + HEADER_HEIGHT + ROW_HEIGHT > self.page_break_trigger:
+                self.add_page()
+            top = self._table_header(headers, widths, labels)
+            for row in data:
+                if self.y + ROW_HEIGHT > self.page_break_trigger:
+                    self._table_grid(widths, top)
+                    self.add_page()
+                    top = self._table_header(headers, widths, labels)
+                x, y = self.l_margin, self.y
+                for header, width, chars in zip(headers, widths, max_chars):
+                    value = str(row.get(header, ''))
+                    if len(value) > chars:
+                        value = "..." + value[3 - chars:] if chars > 3 else value[:chars]
+                    self.text(x + 1, y + 4.2, value)
+                    x += width
+                self.y = y + ROW_HEIGHT
+                self.line(self.l_margin, self.y, right, self.y)
+            self._table_grid(widths, top)
+            self.ln(5)
+
+    return PDF
+
+def __getattr__(name):
+    if name == "PDF":
+        return _pdf_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+TABLE_HEADERS = [
+    "file", "line_count", "sloc", "comment_lines", "blank_lines", "docstring_lines",
+    "function_count", "avg_function_length", "max_function_length",
+    "halstead_volume", "halstead_difficulty", "halstead_effort", "maintainability_index"
+]
+
+PACKAGE_HEADERS = ["package", "files", "line_count", "function_count", "avg_function_length", "max_function_length"]
+WORST_FUNCTION_HEADERS = ["file", "name", "lineno", "complexity", "rank"]
+
+# Shorter column titles, so that every column fits on a landscape page.
+TABLE_LABELS = {
+    "line_count": "lines",
+    "comment_lines": "comments",
+    "blank_lines": "blank",
+    "docstring_lines": "docstrings",
+    "function_count": "functions",
+    "avg_function_length": "avg fn length",
+    "max_function_length": "max fn length",
+    "halstead_volume": "volume",
+    "halstead_difficulty": "difficulty",
+    "halstead_effort": "effort",
+    "maintainability_index": "MI",
+    "lineno": "line",
+}
+
+SUMMARY_LABELS = {
+    "files": "Files",
+    "line_count": "Lines",
+    "function_count": "Functions",
+    "avg_function_length": "Avg. function length",
+    "max_function_length": "Max function length",
+    "avg_complexity": "Avg. complexity",
+    "max_complexity": "Max complexity",
+}
+
+# Above these sizes the report lists the least maintainable files and the packages
+# with the longest functions only; the CSV export always has every file.
+MAX_FILE_ROWS = 1000
+MAX_PACKAGE_ROWS = 200
+
+def _summary_sections(pdf, summary, charts):
+    # Sections built from an aggregate.StreamingAggregator summary.
+    width = pdf.w - pdf.l_margin - pdf.r_margin
+    pdf.chapter_title("Summary")
+    rows = [{"metric": label, "value": summary[key]} for key, label in SUMMARY_LABELS.items()]
+    pdf.add_table(rows, ["metric", "value"], widths=[width / 4] * 2)
+
+    pdf.chapter_title("Rank Distribution")
+    functions = sum(summary["rank_counts"].values())
+    rows = [
+        {"rank": rank, "functions": count, "share": f"{count / functions * 100:.1f}%" if functions else "-"}
+        for rank, count in summary["rank_counts"].items()
+    ]
+    pdf.add_table(rows, ["rank", "functions", "share"], widths=[width / 6] * 3)
+    if charts and functions:
+        from visualize import plot_rank_distribution_png
+        pdf.chart(plot_rank_distribution_png(summary["rank_counts"]), width / 2)
+
+    worst = summary["worst_functions"]
+    if worst:
+        pdf.chapter_title(f"Top {len(worst)} Most Complex Functions")
+        pdf.add_table(worst, WORST_FUNCTION_HEADERS, TABLE_LABELS,
+                      widths=[width * 0.4, width * 0.3, width * 0.1, width * 0.1, width * 0.1])
+
+def _build_pdf(analysis_results, summary=None, charts=True, max_file_rows=MAX_FILE_ROWS,
+               max_package_rows=MAX_PACKAGE_ROWS):
+    # Landscape, so the line-classification and Halstead columns fit next to the function metrics.
+    pdf = _pdf_class()(orientation="L")
     pdf.add_page()
-    pdf.chapter_title("Overall Analysis Results")
-    if analysis_results:
-        headers = ["file", "line_count", "function_count", "avg_function_length", "max_function_length"]
-        pdf.add_table(analysis_results, headers)
-    else:
+    if not analysis_results:
+        pdf.chapter_title("Overall Analysis Results")
         pdf.chapter_body("No Python files found to analyze.")
-    pdf.output(output_path)
+        return pdf
+    if summary is not None:
+        _summary_sections(pdf, summary, charts)
+
+    from visualize import plot_metrics_png, rollup_by_package
+
+    packages = rollup_by_package(analysis_results)
+    title = "Packages"
+    if len(packages) > max_package_rows:
+        title += f" (top {max_package_rows} of {len(packages)} by avg. function length)"
+        packages = heapq.nlargest(max_package_rows, packages, key=lambda row: row["avg_function_length"])
+    pdf.chapter_title(title)
+    pdf.add_table(packages, PACKAGE_HEADERS, TABLE_LABELS)
+    if charts:
+        # Drawn on a page of its own; per file or per package as in the app.
+        pdf.add_page()
+        pdf.chart(plot_metrics_png(analysis_results), pdf.w - pdf.l_margin - pdf.r_margin)
+
+    rows = analysis_results
+    title = "Overall Analysis Results"
+    if len(rows) > max_file_rows:
+        title = f"Least Maintainable Files ({max_file_rows} of {len(rows)}, see the CSV export for all)"
+        rows = heapq.nsmallest(max_file_rows, rows, key=lambda row: row["maintainability_index"])
+    pdf.chapter_title(title)
+    pdf.add_table(rows, TABLE_HEADERS, TABLE_LABELS)
+    return pdf
+
+def create_pdf_report(analysis_results, output_path="output/code_analysis_report.pdf", summary=None, charts=True):
+    # summary is an aggregate.StreamingAggregator summary of the same run; without
+    # it the rank distribution and the most complex functions are left out.
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    _build_pdf(analysis_results, summary, charts).output(output_path)
+
+def create_pdf_report_bytes(analysis_results, summary=None, charts=True):
+    # fpdf2 returns a bytearray; the legacy fpdf 1.x API returns a latin-1 str.
+    data = _build_pdf(analysis_results, summary, charts).output(dest="S")
+    if isinstance(data, str):
+        data = data.encode("latin-1")
+    return bytes(data)
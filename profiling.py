@@ -0,0 +1,120 @@
+import cProfile
+import heapq
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Opt-in instrumentation of the analysis hot paths. Nothing is measured unless a
+# collect() block is active on the current thread; otherwise the instrumented code
+# only pays for one active() lookup per file.
+#
+#   with profiling.collect() as stats:
+#       analyze_folder_records("target_code", jobs=4)
+#   print(json.dumps(stats.to_dict(), indent=2))
+
+TOP_N = 10
+
+_state = threading.local()
+
+def active():
+    return getattr(_state, "stats", None)
+
+class Stats:
+    # Seconds spent per stage (read, parse, walk, cc, halstead, and report stages such as pdf),
+    # counters (files, bytes, functions, ...) and the N slowest files. Work done in
+    # worker processes is merged in, so stage times are summed over all processes
+    # and can exceed the wall time.
+
+    def __init__(self, top_n=TOP_N):
+        self.top_n = top_n
+        self.wall_seconds = 0.0
+        self.stages = {}
+        self.counters = {}
+        self._slowest = []
+        self._order = 0
+        self._last = 0.0
+
+    def lap(self):
+        # Starts a new interval; the next mark() is charged the time since then.
+        self._last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def add_time(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def file_done(self, file_name, seconds, size):
+        self.count("files")
+        self.count("bytes", size)
+        # Min-heap of size N: the root is the fastest of the current N slowest files.
+        self._order += 1
+        entry = (seconds, self._order, file_name)
+        if len(self._slowest) < self.top_n:
+            heapq.heappush(self._slowest, entry)
+        elif seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def merge(self, other):
+        for stage, seconds in other.stages.items():
+            self.add_time(stage, seconds)
+        for name, amount in other.counters.items():
+            self.count(name, amount)
+        for seconds, _, file_name in other._slowest:
+            self._order += 1
+            heapq.heappush(self._slowest, (seconds, self._order, file_name))
+            if len(self._slowest) > self.top_n:
+                heapq.heappop(self._slowest)
+
+    def slowest_files(self):
+        return [
+            {"file": file_name, "seconds": round(seconds, 6)}
+            for seconds, _, file_name in sorted(self._slowest, key=lambda entry: (-entry[0], entry[1]))
+        ]
+
+    def to_dict(self):
+        return {
+            "wall_seconds": round(self.wall_seconds, 6),
+            "stages": {stage: round(seconds, 6) for stage, seconds in sorted(self.stages.items())},
+            "counters": dict(sorted(self.counters.items())),
+            "slowest_files": self.slowest_files(),
+        }
+
+@contextmanager
+def collect(top_n=TOP_N, profile_path=None):
+    # Activates a Stats on the current thread for the duration of the block. With
+    # profile_path a cProfile dump of the block (this process only) is written there,
+    # for use with pstats or snakeviz.
+    stats = Stats(top_n)
+    previous = active()
+    _state.stats = stats
+    profiler = cProfile.Profile() if profile_path else None
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield stats
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        stats.wall_seconds += time.perf_counter() - start
+        _state.stats = previous
+
+def stage(name):
+    # Times a coarse step (report export, chart rendering) when collecting.
+    stats = active()
+    return nullcontext() if stats is None else stats.timer(name)
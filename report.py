@@ -1,5 +1,26 @@
-import pandas as pd
+import csv
 
 def export_to_csv(data, path="output/analysis_report.csv"):
+    import pandas as pd
+
     df = pd.DataFrame(data)
     df.to_csv(path, index=False)
+
+def export_to_csv_bytes(data):
+    import pandas as pd
+
+    return pd.DataFrame(data).to_csv(index=False).encode("utf-8")
+
+def write_csv_rows(rows, path="output/analysis_report.csv", fieldnames=None):
+    # Writes rows (dicts) one at a time as they arrive, without building a DataFrame.
+    rows = iter(rows)
+    first = next(rows, None)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if first is None and fieldnames is None:
+            return
+        writer = csv.DictWriter(f, fieldnames=fieldnames or list(first))
+        writer.writeheader()
+        if first is not None:
+            writer.writerow(first)
+        for row in rows:
+            writer.writerow(row)
@@ -0,0 +1,361 @@
+import heapq
+import json
+import math
+import os
+import sqlite3
+import time
+from itertools import islice
+
+from aggregate import StreamingAggregator
+from analyzer import ANALYZER_VERSION, FILE_METRIC_KEYS
+from function_table import COLUMNS, METRIC_COLUMNS
+
+# A queryable history of analysis runs across repositories, kept in SQLite:
+# repos have runs, runs have files, files have functions. Unlike the result cache
+# (cache.py), nothing is ever replaced; every run adds rows, so questions such as
+# "which functions in any repository are ranked F" are answered from the store
+# instead of by re-running the analysis. Functions are indexed per run on rank,
+# complexity and maintainability index and files per run on path, so a filtered
+# query with a limit reads little more than `limit` rows from each run it covers,
+# however many other runs the store holds.
+
+DEFAULT_STORE_PATH = "output/metrics_store.sqlite"
+
+# Rows inserted per executemany call; a whole run is still one transaction.
+BATCH_SIZE = 10_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    repo_id INTEGER NOT NULL REFERENCES repos (id),
+    started_at INTEGER NOT NULL,
+    folder TEXT NOT NULL,
+    revision TEXT,
+    analyzer_version TEXT NOT NULL,
+    files INTEGER,
+    line_count INTEGER,
+    function_count INTEGER,
+    avg_complexity REAL,
+    max_complexity INTEGER,
+    rank_counts TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    path TEXT NOT NULL,
+    line_count INTEGER NOT NULL,
+    sloc INTEGER NOT NULL,
+    comment_lines INTEGER NOT NULL,
+    blank_lines INTEGER NOT NULL,
+    docstring_lines INTEGER NOT NULL,
+    function_count INTEGER NOT NULL,
+    avg_function_length REAL NOT NULL,
+    max_function_length INTEGER NOT NULL,
+    longest_function TEXT NOT NULL,
+    halstead_volume REAL NOT NULL,
+    halstead_difficulty REAL NOT NULL,
+    halstead_effort REAL NOT NULL,
+    maintainability_index REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS functions (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files (id),
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    start_line INTEGER NOT NULL,
+    end_line INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    complexity INTEGER NOT NULL,
+    rank TEXT NOT NULL,
+    nesting_depth INTEGER NOT NULL,
+    halstead_volume REAL,
+    halstead_difficulty REAL,
+    halstead_effort REAL,
+    maintainability_index REAL
+);
+CREATE INDEX IF NOT EXISTS runs_repo ON runs (repo_id);
+CREATE INDEX IF NOT EXISTS files_run_path ON files (run_id, path);
+CREATE INDEX IF NOT EXISTS functions_file ON functions (file_id);
+CREATE INDEX IF NOT EXISTS functions_run_rank_complexity ON functions (run_id, rank, complexity);
+CREATE INDEX IF NOT EXISTS functions_run_complexity ON functions (run_id, complexity);
+CREATE INDEX IF NOT EXISTS functions_run_maintainability ON functions (run_id, maintainability_index);
+"""
+
+_FILE_COLUMNS = FILE_METRIC_KEYS[1:]
+_FUNCTION_COLUMNS = COLUMNS[1:]
+
+RUN_COLUMNS = ["run", "repo", "started_at", "folder", "revision", "analyzer_version", "files",
+               "line_count", "function_count", "avg_complexity", "max_complexity", "rank_counts"]
+FUNCTION_COLUMNS = ["repo", "run", "file"] + _FUNCTION_COLUMNS
+
+# Columns functions() can order by; each has a per-run index to scan in order.
+ORDER_COLUMNS = ["complexity", "maintainability_index"]
+
+# Complexity range of each rank (complexity.cc_rank); F has no upper bound.
+RANK_BOUNDS = {"A": (0, 5), "B": (6, 10), "C": (11, 20), "D": (21, 30), "E": (31, 40), "F": (41, None)}
+
+class RunWriter:
+    # One run being recorded. Rows are collected and inserted with executemany
+    # every BATCH_SIZE rows, inside the transaction MetricsStore.begin_run opened;
+    # close() stores the run totals and commits, abort() rolls everything back.
+    # File ids are assigned here (the transaction holds the write lock), so
+    # function rows can refer to their file without a query per file.
+
+    def __init__(self, conn, run_id, batch_size=BATCH_SIZE):
+        self._conn = conn
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self.aggregator = StreamingAggregator()
+        self._next_file_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM files").fetchone()[0]
+        self._files = []
+        self._functions = []
+
+    def add(self, record):
+        self.aggregator.add(record)
+        file_id = self._next_file_id
+        self._next_file_id += 1
+        self._files.append((file_id, self.run_id, record["file"]) + tuple(record[key] for key in _FILE_COLUMNS))
+        for block in record["complexity"]:
+            self._functions.append((
+                file_id, self.run_id, block["qualname"], block["kind"], block["lineno"], block["endline"],
+                block["endline"] - block["lineno"] + 1, block["complexity"], block["rank"], block["nesting_depth"],
+            ) + tuple(block.get(column) for column in METRIC_COLUMNS))
+        if len(self._functions) >= self.batch_size or len(self._files) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        placeholders = ", ".join("?" * (len(_FILE_COLUMNS) + 3))
+        self._conn.executemany(f"INSERT INTO files VALUES ({placeholders})", self._files)
+        placeholders = ", ".join("?" * len(_FUNCTION_COLUMNS))
+        self._conn.executemany(
+            f"INSERT INTO functions (file_id, run_id, {', '.join(_FUNCTION_COLUMNS)}) VALUES (?, ?, {placeholders})",
+            self._functions
+        )
+        self._files, self._functions = [], []
+
+    def close(self):
+        self._flush()
+        summary = self.aggregator.summary()
+        self._conn.execute(
+            "UPDATE runs SET files = ?, line_count = ?, function_count = ?, avg_complexity = ?, "
+            "max_complexity = ?, rank_counts = ? WHERE id = ?",
+            (summary["files"], summary["line_count"], summary["function_count"], summary["avg_complexity"],
+             summary["max_complexity"], json.dumps(summary["rank_counts"]), self.run_id)
+        )
+        self._conn.execute("COMMIT")
+        # Refreshes the planner statistics where the new rows made them stale.
+        self._conn.execute("PRAGMA optimize")
+
+    def abort(self):
+        self._conn.execute("ROLLBACK")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+class MetricsStore:
+    # The store at `path`, created on first use. Writes go through begin_run or
+    # add_run; the other methods are the query API.
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Transactions are opened and committed explicitly (see begin_run).
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def begin_run(self, repo, folder, revision=None, batch_size=BATCH_SIZE):
+        # Starts recording a run of `repo` and returns its RunWriter; the run and
+        # all its rows appear at once, when the writer is closed.
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute("INSERT OR IGNORE INTO repos (name) VALUES (?)", (repo,))
+            repo_id = self._conn.execute("SELECT id FROM repos WHERE name = ?", (repo,)).fetchone()[0]
+            run_id = self._conn.execute(
+                "INSERT INTO runs (repo_id, started_at, folder, revision, analyzer_version) VALUES (?, ?, ?, ?, ?)",
+                (repo_id, int(time.time()), os.path.abspath(folder), revision, ANALYZER_VERSION)
+            ).lastrowid
+            return RunWriter(self._conn, run_id, batch_size)
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def add_run(self, records, repo, folder, revision=None, batch_size=BATCH_SIZE):
+        with self.begin_run(repo, folder, revision, batch_size) as run:
+            for record in records:
+                run.add(record)
+        return run.run_id
+
+    def _rows(self, sql, params, columns):
+        return [dict(zip(columns, row)) for row in self._conn.execute(sql, params)]
+
+    def repos(self):
+        return [name for (name,) in self._conn.execute("SELECT name FROM repos ORDER BY name")]
+
+    def runs(self, repo=None, latest=False):
+        # Runs with their totals, newest first; with latest, only each repo's last run.
+        sql = (
+            "SELECT runs.id, repos.name, started_at, folder, revision, analyzer_version, files, line_count, "
+            "function_count, avg_complexity, max_complexity, rank_counts FROM runs JOIN repos ON repos.id = runs.repo_id"
+        )
+        where, params = [], []
+        if repo is not None:
+            where.append("repos.name = ?")
+            params.append(repo)
+        if latest:
+            where.append("runs.id IN (SELECT MAX(id) FROM runs GROUP BY repo_id)")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        rows = self._rows(sql + " ORDER BY runs.id DESC", params, RUN_COLUMNS)
+        for row in rows:
+            row["rank_counts"] = json.loads(row["rank_counts"] or "{}")
+        return rows
+
+    def _target_runs(self, repo=None, latest=True):
+        # {run id: repo name} of the runs functions() searches: each repo's latest
+        # run, or with latest=False all of them. Runs are few next to functions, so
+        # resolving them first is cheap and lets every function lookup start from
+        # the per-run indexes.
+        sql = "SELECT MAX(runs.id), repos.name" if latest else "SELECT runs.id, repos.name"
+        sql += " FROM runs JOIN repos ON repos.id = runs.repo_id"
+        params = []
+        if repo is not None:
+            sql += " WHERE repos.name = ?"
+            params.append(repo)
+        if latest:
+            sql += " GROUP BY runs.repo_id"
+        return dict(self._conn.execute(sql, params).fetchall())
+
+    def functions(self, repo=None, latest=True, limit=100, order_by="complexity", descending=True, **filters):
+        # Functions, methods and classes matching every filter given (see _functions_sql),
+        # as dicts with the FUNCTION_COLUMNS, from each repo's latest run unless latest
+        # is False. Each run is read on its own, in index order, and the runs are
+        # merged lazily, so about `limit` rows plus a short page per run are read
+        # however many rows the runs hold.
+        runs = self._target_runs(repo, latest)
+        if not runs:
+            return []
+        first, after, params = self._functions_sql(runs, limit=limit, order_by=order_by, descending=descending, **filters)
+        page = limit // len(runs) + 1
+        streams = [self._run_rows(first, after, [repo, run_id], params, page) for run_id, repo in runs.items()]
+        # Rows end with (order_by value, functions.id), the order each run is in.
+        merged = heapq.merge(*streams, key=lambda row: row[-2:], reverse=descending)
+        return [dict(zip(FUNCTION_COLUMNS, row)) for row in islice(merged, limit)]
+
+    def _run_rows(self, first, after, run, params, page):
+        # One run's rows in order, a page at a time; each page continues after the
+        # last row of the previous one and is twice as large. Every page is fetched
+        # completely, so no statement stays open while the runs are merged (Python
+        # compiles a statement anew for every cursor holding it open).
+        rows = self._conn.execute(first, run + params + [page]).fetchall()
+        while rows:
+            yield from rows
+            if len(rows) < page:
+                return
+            page *= 2
+            rows = self._conn.execute(after, run + params + list(rows[-1][-2:]) + [page]).fetchall()
+
+    def _files_first(self, runs, path_prefix, limit):
+        # Whether a path prefix is cheaper to start from the path index, sorting the
+        # functions of every matching file, than from the function indexes in order,
+        # skipping the functions of other files until enough match. The first reads
+        # about matched * functions / files rows, the second (limit + runs) * files /
+        # matched, so the first wins below a number of matching files known from the
+        # run totals, and the count stops there.
+        ids = ", ".join("?" * len(runs))
+        files, functions = self._conn.execute(
+            f"SELECT SUM(files), SUM(function_count) FROM runs WHERE id IN ({ids})", list(runs)
+        ).fetchone()
+        threshold = int((files or 0) * math.sqrt((limit + len(runs)) / max(functions or 0, 1)))
+        matched = self._conn.execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM files WHERE run_id IN ({ids}) AND path >= ? AND path < ? LIMIT ?)",
+            list(runs) + [path_prefix, path_prefix + "\U0010ffff", threshold + 1]
+        ).fetchone()[0]
+        return matched <= threshold
+
+    def _functions_sql(self, runs, ranks=None, min_complexity=None, path_prefix=None,
+                       order_by="complexity", descending=True, limit=100):
+        # The queries for one of the runs: the first page and the pages after a given
+        # row. Their parameters start with the repo name and run id, then params,
+        # then the last row's (order_by value, id) for the later pages, then the page
+        # size. path_prefix is matched as a range on the path index, so it must be
+        # the start of the path.
+        if order_by not in ORDER_COLUMNS:
+            raise ValueError(f"cannot order by {order_by!r} (expected one of {', '.join(ORDER_COLUMNS)})")
+        # The join order is fixed (CROSS JOIN): the run's function indexes drive the
+        # query and the ORDER BY, with files looked up by primary key, so LIMIT stops
+        # the scan early. Only a path prefix matching few files starts from the
+        # run's path index, then sorts the functions of the matching files.
+        params = []
+        if path_prefix and self._files_first(runs, path_prefix, limit):
+            tables, where = "files CROSS JOIN functions", ["files.run_id = ?", "files.path >= ? AND files.path < ?"]
+            params += [path_prefix, path_prefix + "\U0010ffff"]
+        else:
+            tables, where = "functions CROSS JOIN files", ["functions.run_id = ?"]
+            if path_prefix:
+                where.append("files.path >= ? AND files.path < ?")
+                params += [path_prefix, path_prefix + "\U0010ffff"]
+        sql = (
+            "SELECT ?, functions.run_id, files.path, "
+            + ", ".join(f"functions.{column}" for column in _FUNCTION_COLUMNS)
+            + f", functions.{order_by}, functions.id FROM {tables}"
+        )
+        where.append("files.id = functions.file_id")
+        if ranks is not None:
+            ranks = list(ranks)
+            if len(ranks) == 1:
+                where.append("functions.rank = ?")
+                params += ranks
+            else:
+                # Several ranks become the complexity range they span (ranks follow
+                # complexity), which the complexity index can scan in order.
+                low = RANK_BOUNDS[min(ranks)][0]
+                high = RANK_BOUNDS[max(ranks)][1]
+                where.append("functions.complexity >= ?")
+                params.append(low)
+                if high is not None:
+                    where.append("functions.complexity <= ?")
+                    params.append(high)
+                where.append(f"+functions.rank IN ({', '.join('?' * len(ranks))})")
+                params += ranks
+        if min_complexity:
+            where.append("functions.complexity >= ?")
+            params.append(min_complexity)
+        # Classes have no maintainability index; they are left out when ordering by it.
+        where.append(f"functions.{order_by} IS NOT NULL")
+        sql += f" WHERE {' AND '.join(where)}"
+        direction = "DESC" if descending else "ASC"
+        order = f" ORDER BY functions.{order_by} {direction}, functions.id {direction} LIMIT ?"
+        after = f" AND (functions.{order_by}, functions.id) {'<' if descending else '>'} (?, ?)"
+        return sql + order, sql + after + order, params
+
+    def query_plan(self, repo=None, latest=True, **filters):
+        # What SQLite does for each run in functions(**filters): the indexes it uses, per step.
+        runs = self._target_runs(repo, latest)
+        if not runs:
+            return []
+        first, _, params = self._functions_sql(runs, **filters)
+        run_id, repo = next(iter(runs.items()))
+        return [detail for *_, detail in self._conn.execute("EXPLAIN QUERY PLAN " + first, [repo, run_id] + params + [1])]
@@ -1,38 +1,165 @@
-import matplotlib.pyplot as plt
-import plotly.express as px
-import pandas as pd
+import heapq
+from io import BytesIO
 
-def plot_folder_complexity_interactive(complexity_results):
+# matplotlib, plotly and pandas are imported inside the functions that need them,
+# so importing this module (which app.py does on every Streamlit rerun) stays cheap.
+# Static charts are drawn on standalone Figure objects rather than through pyplot's
+# global state, so concurrent sessions cannot draw into each other's figures.
+
+# One bar per file or per function stops being readable, and the plotly JSON and
+# matplotlib layout grow with the repo, so above these sizes charts switch to
+# aggregated views: files are rolled up per package and functions become a
+# complexity histogram or the TOP_K most complex, and scatter points are merged.
+# Every chart function also takes its threshold as a keyword argument.
+MAX_FILE_BARS = 100
+MAX_FUNCTION_BARS = 200
+MAX_SCATTER_POINTS = 20000
+TOP_K = 30
+
+def _package(file_name):
+    # File names are "/"-separated paths relative to the analyzed folder.
+    package, _, _ = file_name.rpartition("/")
+    return package or "."
+
+def rollup_by_package(data):
+    # One row per package (directory): file, line and function counts summed, the
+    # average function length weighted by function count, the maximum kept.
+    packages = {}
+    for item in data:
+        name = _package(item["file"])
+        row = packages.get(name)
+        if row is None:
+            row = packages[name] = {"package": name, "files": 0, "line_count": 0, "function_count": 0,
+                                    "avg_function_length": 0, "max_function_length": 0}
+        row["files"] += 1
+        row["line_count"] += item["line_count"]
+        row["function_count"] += item["function_count"]
+        # Summed here, divided below.
+        row["avg_function_length"] += item["avg_function_length"] * item["function_count"]
+        row["max_function_length"] = max(row["max_function_length"], item["max_function_length"])
+    for row in packages.values():
+        if row["function_count"]:
+            row["avg_function_length"] = round(row["avg_function_length"] / row["function_count"], 2)
+    return list(packages.values())
+
+def _file_bars(data, max_bars):
+    # (rows, x column, title suffix): the files themselves, or else their packages,
+    # limited to the max_bars with the longest functions on average.
+    if len(data) <= max_bars:
+        return data, "file", ""
+    rows = rollup_by_package(data)
+    suffix = f" (per package, {len(data)} files)"
+    if len(rows) > max_bars:
+        suffix = f" (per package, top {max_bars} of {len(rows)} packages)"
+        rows = heapq.nlargest(max_bars, rows, key=lambda row: row["avg_function_length"])
+    return rows, "package", suffix
+
+def _function_frame(complexity_results):
+    # Accepts either a {file: blocks} mapping or a function_table.FunctionTable.
+    import pandas as pd
+
+    if hasattr(complexity_results, "to_pandas"):
+        return complexity_results.to_pandas().rename(
+            columns={"file": "File", "name": "Function", "complexity": "Complexity", "rank": "Rank"}
+        )
     all_data = []
     for file_name, functions in complexity_results.items():
         for func in functions:
             all_data.append({
                 "File": file_name,
                 "Function": func["name"],
-                "Complexity": func["complexity"]
+                "Complexity": func["complexity"],
+                "Rank": func["rank"]
             })
 
-    df = pd.DataFrame(all_data)
+    return pd.DataFrame(all_data, columns=["File", "Function", "Complexity", "Rank"])
+
+def plot_folder_complexity_interactive(complexity_results, mode="auto", max_bars=MAX_FUNCTION_BARS, top_k=TOP_K):
+    # mode is "bars" (one bar per function), "top" (the top_k most complex) or
+    # "histogram" (functions per complexity value); "auto" draws bars up to
+    # max_bars functions and a histogram above.
+    import plotly.express as px
+
+    df = _function_frame(complexity_results)
+    if mode == "auto":
+        mode = "bars" if len(df) <= max_bars else "histogram"
+    title = "Function-Level Complexity Scores (All Files)"
+
+    if mode == "histogram":
+        # Binned here, so the figure holds one bar per complexity value, not per function.
+        counts = df.groupby(["Complexity", "Rank"], observed=True).size().reset_index(name="Functions")
+        return px.bar(counts, x="Complexity", y="Functions", color="Rank",
+                      category_orders={"Rank": list("ABCDEF")},
+                      title=f"Complexity Distribution ({len(df)} functions)")
+    if mode == "top":
+        title = f"Most Complex Functions (top {min(top_k, len(df))} of {len(df)})"
+        df = df.nlargest(top_k, "Complexity")
 
     fig = px.bar(df, x="Function", y="Complexity", color="Complexity",
                  hover_data=["File"], barmode="group",
                  color_continuous_scale=["#7FFF00", "#FFD700", "#FF0000"],
-                 title="Function-Level Complexity Scores (All Files)")
+                 title=title)
 
     return fig
 
-def plot_metrics_interactive(data):
-    df = pd.DataFrame(data)
+def plot_length_vs_complexity(complexity_results, max_points=MAX_SCATTER_POINTS):
+    # Length against complexity for every function and method, drawn with WebGL
+    # (scattergl) so the browser copes with tens of thousands of points; classes
+    # are left out. Above max_points, functions with the same length and complexity
+    # (which would be drawn on top of each other anyway) become one point with a
+    # count. Accepts the same inputs as plot_folder_complexity_interactive.
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    if hasattr(complexity_results, "to_pandas"):
+        df = complexity_results.to_pandas()[["name", "kind", "length", "complexity"]]
+    else:
+        df = pd.DataFrame([
+            {"name": block["qualname"], "kind": block["kind"],
+             "length": block["endline"] - block["lineno"] + 1, "complexity": block["complexity"]}
+            for functions in complexity_results.values() for block in functions
+        ], columns=["name", "kind", "length", "complexity"])
+    df = df[df["kind"] != "class"]
+    title = f"Function Length vs. Complexity ({len(df)} functions)"
+
+    if len(df) > max_points:
+        df = df.groupby(["length", "complexity"]).size().reset_index(name="functions")
+        text = df["functions"].astype(str) + " functions"
+        title += f", {len(df)} distinct points"
+    else:
+        text = df["name"].astype(str)
+
+    fig = go.Figure(go.Scattergl(
+        x=df["length"].to_numpy(), y=df["complexity"].to_numpy(), text=text, mode="markers",
+        marker={"color": df["complexity"].to_numpy(), "size": 6,
+                "colorscale": [[0, "#7FFF00"], [0.5, "#FFD700"], [1, "#FF0000"]]},
+        hovertemplate="%{text}<br>length %{x}<br>complexity %{y}<extra></extra>"
+    ))
+    fig.update_layout(title=title, xaxis_title="Function Length (lines)", yaxis_title="Complexity")
+    return fig
+
+def plot_metrics_interactive(data, max_bars=MAX_FILE_BARS):
+    import pandas as pd
+    import plotly.express as px
+
+    rows, x, suffix = _file_bars(data, max_bars)
+    df = pd.DataFrame(rows)
+    if x == "file":
+        hover_data = ["line_count", "function_count", "max_function_length", "longest_function",
+                      "halstead_volume", "halstead_effort", "maintainability_index"]
+    else:
+        hover_data = ["files", "line_count", "function_count", "max_function_length"]
 
     fig = px.bar(
         df,
-        x="file",
+        x=x,
         y="avg_function_length",
         color="max_function_length",
-        hover_data=["line_count", "function_count", "max_function_length"],
-        title="Function Lengths per File",
+        hover_data=hover_data,
+        title="Function Lengths per File" + suffix,
         labels={
             "file": "File Name",
+            "package": "Package",
             "avg_function_length": "Avg. Function Length",
             "max_function_length": "Max Function Length"
         }
@@ -41,38 +168,109 @@ def plot_metrics_interactive(data):
     fig.update_layout(xaxis_tickangle=-45)
     return fig
 
-def plot_metrics(data):
-    files = [item['file'] for item in data]
-    funcs = [item['function_count'] for item in data]
-    avg_len = [item['avg_function_length'] for item in data]
-
-    plt.figure(figsize=(10, 5))
-    plt.bar(files, funcs, label="Function Count")
-    plt.bar(files, avg_len, label="Avg. Function Length", bottom=funcs)
-    plt.title("Function Count and Length")
-    plt.xlabel("File")
-    plt.ylabel("Metrics")
-    plt.legend()
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig("output/metric_graph.png")
-
-def plot_complexity_bar(complexity_data):
+def _metrics_figure(data, max_bars=MAX_FILE_BARS):
+    from matplotlib.figure import Figure
+
+    rows, x, suffix = _file_bars(data, max_bars)
+    files = [item[x] for item in rows]
+    funcs = [item['function_count'] for item in rows]
+    avg_len = [item['avg_function_length'] for item in rows]
+
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    ax.bar(files, funcs, label="Function Count")
+    ax.bar(files, avg_len, label="Avg. Function Length", bottom=funcs)
+    ax.set_title("Function Count and Length" + suffix)
+    ax.set_xlabel("File" if x == "file" else "Package")
+    ax.set_ylabel("Metrics")
+    ax.legend()
+    ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+    return fig
+
+def _complexity_figure(complexity_data, max_bars=MAX_FUNCTION_BARS, top_k=TOP_K):
+    from matplotlib.figure import Figure
+
+    title = "Cyclomatic Complexity (Radon CC)"
+    if len(complexity_data) > max_bars:
+        title += f" – top {top_k} of {len(complexity_data)}"
+        complexity_data = heapq.nlargest(top_k, complexity_data, key=lambda block: block['complexity'])
+
     names = [block['name'] for block in complexity_data]
     complexities = [block['complexity'] for block in complexity_data]
     ranks = [block['rank'] for block in complexity_data]
 
-    plt.figure(figsize=(12, 6))
-    bars = plt.bar(names, complexities, color="skyblue")
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
+    # One bar per block even when names repeat (methods of different classes).
+    bars = ax.bar(range(len(names)), complexities, color="skyblue")
+    ax.set_xticks(range(len(names)), names)
 
-    plt.xlabel("Function Name")
-    plt.ylabel("Complexity")
-    plt.title("Cyclomatic Complexity (Radon CC)")
-    plt.xticks(rotation=45)
+    ax.set_xlabel("Function Name")
+    ax.set_ylabel("Complexity")
+    ax.set_title(title)
+    ax.tick_params(axis="x", labelrotation=45)
 
     for bar, rank in zip(bars, ranks):
-        plt.text(bar.get_x() + bar.get_width()/2, bar.get_height(), rank,
-                 ha='center', va='bottom', fontsize=8, color='gray')
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height(), rank,
+                ha='center', va='bottom', fontsize=8, color='gray')
+
+    fig.tight_layout()
+    return fig
+
+def _rank_figure(rank_counts):
+    # rank_counts as in aggregate.StreamingAggregator.summary(): {rank: functions}.
+    from matplotlib.figure import Figure
+
+    ranks = list(rank_counts)
+    colors = ["#7FFF00", "#ADFF2F", "#FFD700", "#FFA500", "#FF4500", "#FF0000"]
+    fig = Figure(figsize=(6, 3))
+    ax = fig.subplots()
+    ax.bar(ranks, [rank_counts[rank] for rank in ranks], color=colors[:len(ranks)])
+    ax.set_title("Functions per Complexity Rank")
+    ax.set_xlabel("Rank")
+    ax.set_ylabel("Functions")
+    fig.tight_layout()
+    return fig
+
+def _png_bytes(fig):
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+def plot_metrics(data, path="output/metric_graph.png", max_bars=MAX_FILE_BARS):
+    _metrics_figure(data, max_bars).savefig(path)
 
-    plt.tight_layout()
-    plt.savefig("output/complexity_graph.png")
+def plot_metrics_png(data, max_bars=MAX_FILE_BARS):
+    return _png_bytes(_metrics_figure(data, max_bars))
+
+def plot_complexity_bar(complexity_data, path="output/complexity_graph.png", max_bars=MAX_FUNCTION_BARS, top_k=TOP_K):
+    _complexity_figure(complexity_data, max_bars, top_k).savefig(path)
+
+def plot_complexity_bar_png(complexity_data, max_bars=MAX_FUNCTION_BARS, top_k=TOP_K):
+    return _png_bytes(_complexity_figure(complexity_data, max_bars, top_k))
+
+def plot_rank_distribution_png(rank_counts):
+    return _png_bytes(_rank_figure(rank_counts))
+
+def plot_trend_interactive(trend_rows):
+    # trend_rows as produced by history.complexity_trend, oldest commit first.
+    import pandas as pd
+    import plotly.express as px
+
+    df = pd.DataFrame(trend_rows)
+    df["date"] = pd.to_datetime(df["timestamp"], unit="s")
+    df["commit"] = df["commit"].str[:10]
+    long_df = df.melt(
+        id_vars=["date", "commit", "subject"],
+        value_vars=["avg_complexity", "max_complexity", "avg_function_length", "max_function_length"],
+        var_name="metric", value_name="value"
+    )
+
+    fig = px.line(
+        long_df, x="date", y="value", color="metric", markers=True,
+        hover_data=["commit", "subject"],
+        title="Complexity and Function Length Trend",
+        labels={"date": "Commit Date", "value": "Value", "metric": "Metric"}
+    )
+    return fig
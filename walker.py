@@ -0,0 +1,131 @@
+import fnmatch
+import hashlib
+import os
+import re
+
+# Directory and file names that are never worth descending into or analyzing.
+DEFAULT_IGNORES = [
+    ".git", ".hg", ".svn", "__pycache__", "venv", ".venv", "node_modules",
+    ".tox", ".nox", ".mypy_cache", ".pytest_cache", ".ruff_cache", "*.egg-info",
+]
+
+def _glob_to_regex(pattern):
+    parts, i = [], 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1:]:
+            end = pattern.index("]", i + 1)
+            chars = pattern[i + 1:end].replace("\\", "\\\\")
+            if chars.startswith("!"):
+                chars = "^" + chars[1:]
+            parts.append("[" + chars + "]")
+            i = end + 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(parts) + r"\Z")
+
+class _Rule:
+    # One .gitignore line, relative to the directory (base) whose .gitignore holds it.
+
+    def __init__(self, base, pattern):
+        self.negate = pattern.startswith("!")
+        if self.negate:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        # Patterns containing a slash are anchored to base; others match a name at any depth.
+        self.anchored = "/" in pattern
+        self.base = base
+        self.regex = _glob_to_regex(pattern.lstrip("/"))
+
+    def matches(self, rel_path, name, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        if not self.anchored:
+            return self.regex.match(name) is not None
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return False
+            rel_path = rel_path[len(self.base) + 1:]
+        return self.regex.match(rel_path) is not None
+
+def _read_gitignore(directory, base):
+    try:
+        with open(os.path.join(directory, ".gitignore"), "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except (OSError, UnicodeDecodeError):
+        return []
+    rules = []
+    for line in lines:
+        line = line.rstrip()
+        if line and not line.startswith("#"):
+            rules.append(_Rule(base, line))
+    return rules
+
+def _is_ignored(rules, globs, rel_path, name, is_dir):
+    if any(fnmatch.fnmatch(name, glob) or fnmatch.fnmatch(rel_path, glob) for glob in globs):
+        return True
+    ignored = False
+    # Later rules (and deeper .gitignore files) override earlier ones, as in git.
+    for rule in rules:
+        if rule.matches(rel_path, name, is_dir):
+            ignored = not rule.negate
+    return ignored
+
+def iter_python_files(root, ignore=None, use_gitignore=True):
+    # Lazily yields the .py files below root, depth-first in sorted order. Ignored
+    # directories are pruned before they are opened. Only the entries of the
+    # directory currently being listed are held in memory, never the whole tree.
+    globs = DEFAULT_IGNORES if ignore is None else ignore
+    stack = [("", [])]
+    while stack:
+        rel_dir, rules = stack.pop()
+        directory = os.path.join(root, rel_dir) if rel_dir else root
+        if use_gitignore:
+            rules = rules + _read_gitignore(directory, rel_dir)
+        # Entries are filtered while the directory is read and only the kept ones
+        # are sorted, so a directory full of data files is never held in memory.
+        kept = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if not is_dir and not (entry.name.endswith(".py") and entry.is_file()):
+                            continue
+                    except OSError:
+                        continue
+                    if not _is_ignored(rules, globs, rel_path, entry.name, is_dir):
+                        kept.append((entry.name, rel_path, entry.path, is_dir))
+        except OSError:
+            continue
+
+        subdirs = []
+        for _, rel_path, path, is_dir in sorted(kept):
+            if is_dir:
+                subdirs.append((rel_path, rules))
+            else:
+                yield path
+        stack.extend(reversed(subdirs))
+
+def folder_fingerprint(root, ignore=None):
+    # Cheap change detector for a folder: hashes relative paths, mtimes and sizes
+    # of the files the walker would analyze, without reading their contents.
+    digest = hashlib.sha1()
+    for path in iter_python_files(root, ignore):
+        stat = os.stat(path)
+        digest.update(f"{os.path.relpath(path, root)}\0{stat.st_mtime_ns}\0{stat.st_size}\n".encode("utf-8"))
+    return digest.hexdigest()
@@ -0,0 +1,227 @@
+import os
+import threading
+import time
+import weakref
+from functools import partial
+
+from analyzer import analyze_file, map_files
+from walker import iter_python_files
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    # Without watchdog the folder is polled instead (see FolderWatcher._poll).
+    FileSystemEventHandler = object
+    Observer = None
+
+DEFAULT_DEBOUNCE = 0.5
+DEFAULT_POLL_INTERVAL = 2.0
+
+_CHANGE_EVENTS = ("created", "modified", "deleted", "moved")
+
+def _analyze_if_valid(path, root):
+    # Files are often saved half-edited; those keep their last good analysis.
+    try:
+        return analyze_file(path, root)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        # Open/close events (our own reads produce them) are ignored. Directory events
+        # matter too (a moved package), but e.g. .pyc writes do not.
+        if event.event_type not in _CHANGE_EVENTS:
+            return
+        paths = [event.src_path, getattr(event, "dest_path", "")]
+        paths = [path for path in paths if path and (event.is_directory or path.endswith(".py"))]
+        if paths:
+            self.watcher.notify(paths)
+
+class FolderWatcher:
+    # Keeps the analysis of a folder up to date. After one full scan, file-system
+    # events (watchdog/inotify, or a polling fallback) are collected and coalesced:
+    # a batch is only processed once no new event arrived for `debounce` seconds,
+    # so a checkout touching thousands of files triggers a single re-analysis.
+    # While nothing changes the worker thread is blocked and uses no CPU.
+
+    def __init__(self, folder, jobs=1, ignore=None, debounce=DEFAULT_DEBOUNCE,
+                 poll_interval=DEFAULT_POLL_INTERVAL, on_update=None, use_watchdog=True):
+        self.folder = folder
+        self.jobs = jobs
+        self.ignore = ignore
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.on_update = on_update
+        self.use_watchdog = use_watchdog and Observer is not None
+        self.version = 0
+        self._records = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition()
+        self._pending = set()
+        self._last_event = 0.0
+        self._stopped = threading.Event()
+        self._threads = []
+        self._observer = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        # Events are collected from before the initial scan so that nothing changing
+        # during the scan is missed; they are processed once the scan is done.
+        if self.use_watchdog:
+            self._observer = Observer()
+            self._observer.schedule(_EventHandler(self), self.folder, recursive=True)
+            self._observer.start()
+        else:
+            self._start_thread(self._poll)
+
+        paths = list(iter_python_files(self.folder, self.ignore))
+        analyzed = map_files(partial(_analyze_if_valid, root=self.folder), paths, self.jobs)
+        self._records = {path: record for path, record in zip(paths, analyzed) if record is not None}
+        self._publish(list(self._records.values()), [])
+        self._start_thread(self._process_batches)
+
+    def stop(self):
+        # May run on one of the watcher's own threads (the last WatcherLease can be
+        # collected anywhere); that thread is not joined, it ends once it returns.
+        self._stopped.set()
+        with self._changed:
+            self._changed.notify_all()
+        current = threading.current_thread()
+        if self._observer is not None:
+            self._observer.stop()
+            if self._observer is not current:
+                self._observer.join()
+        for thread in self._threads:
+            if thread is not current:
+                thread.join()
+
+    def records(self):
+        with self._lock:
+            return [self._records[path] for path in sorted(self._records)]
+
+    def notify(self, paths):
+        with self._changed:
+            self._pending.update(os.path.abspath(path) for path in paths)
+            self._last_event = time.monotonic()
+            self._changed.notify()
+
+    def _start_thread(self, target):
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _next_batch(self):
+        with self._changed:
+            while not self._pending and not self._stopped.is_set():
+                self._changed.wait()
+            # Keep absorbing events until the folder has been quiet for `debounce` seconds.
+            while not self._stopped.is_set():
+                remaining = self._last_event + self.debounce - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+            batch, self._pending = self._pending, set()
+        return batch
+
+    def _process_batches(self):
+        while not self._stopped.is_set():
+            batch = self._next_batch()
+            if batch and not self._stopped.is_set():
+                self._apply(batch)
+
+    def _apply(self, batch):
+        # The walk re-applies the ignore rules and .gitignore files, and also picks up
+        # files whose events were folded into a directory-level event.
+        current = {os.path.abspath(path): path for path in iter_python_files(self.folder, self.ignore)}
+        with self._lock:
+            known = {os.path.abspath(path): path for path in self._records}
+        removed = [path for key, path in known.items() if key not in current]
+        changed = sorted(path for key, path in current.items() if key in batch or key not in known)
+
+        analyzed = map_files(partial(_analyze_if_valid, root=self.folder), changed, self.jobs)
+        records = {path: record for path, record in zip(changed, analyzed) if record is not None}
+        with self._lock:
+            removed_files = [self._records.pop(path)["file"] for path in removed]
+            self._records.update(records)
+        records = list(records.values())
+        if records or removed_files:
+            self._publish(records, removed_files)
+
+    def _publish(self, changed_records, removed_files):
+        self.version += 1
+        if self.on_update is not None:
+            self.on_update(changed_records, removed_files)
+
+    def _snapshot(self):
+        snapshot = {}
+        for path in iter_python_files(self.folder, self.ignore):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[os.path.abspath(path)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _poll(self):
+        previous = self._snapshot()
+        while not self._stopped.wait(self.poll_interval):
+            current = self._snapshot()
+            changed = [path for path in current.keys() | previous.keys() if current.get(path) != previous.get(path)]
+            if changed:
+                self.notify(changed)
+            previous = current
+
+class WatcherLease:
+    # One holder's share of a SharedWatchers watcher. release() (or the lease being
+    # garbage collected, e.g. with the session state holding it) gives it back.
+
+    def __init__(self, watcher, release):
+        self.watcher = watcher
+        self.folder = watcher.folder
+        self.release = weakref.finalize(self, release)
+
+class SharedWatchers:
+    # One FolderWatcher per folder, shared by every holder of a lease on it and
+    # stopped once the last lease is released. Holders that go away without
+    # releasing (an ended Streamlit session) release when their lease is collected.
+
+    def __init__(self, **options):
+        self.options = options
+        self._lock = threading.Lock()
+        self._watchers = {}
+
+    def acquire(self, folder, jobs=1):
+        # The first holder's jobs setting is used; the initial scan runs under the
+        # lock so a second holder of the same folder waits for it instead of rescanning.
+        key = os.path.abspath(folder)
+        with self._lock:
+            entry = self._watchers.get(key)
+            if entry is None:
+                watcher = FolderWatcher(folder, jobs=jobs, **self.options)
+                watcher.start()
+                entry = self._watchers[key] = [watcher, 0]
+            entry[1] += 1
+        return WatcherLease(entry[0], partial(self._release, key))
+
+    def _release(self, key):
+        with self._lock:
+            entry = self._watchers[key]
+            entry[1] -= 1
+            if entry[1]:
+                return
+            del self._watchers[key]
+        entry[0].stop()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._watchers)